@@ -0,0 +1,128 @@
+import gzip
+import json
+import os
+from typing import List
+
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from scrate.reviews import NEW_REVIEWS_JS, REVIEWS_JS
+from scrate.snapshot import PANE_JS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name: str) -> str:
+    with gzip.open(
+        os.path.join(FIXTURE_DIR, name + ".html.gz"), "rt", encoding="utf-8"
+    ) as fd:
+        return fd.read()
+
+
+def fixture_names() -> List[str]:
+    return sorted(
+        f[: -len(".html.gz")]
+        for f in os.listdir(FIXTURE_DIR)
+        if f.endswith(".html.gz")
+    )
+
+
+class FakeElement:
+    """Stands in for a selenium WebElement backed by an lxml element"""
+
+    def __init__(self, el: etree._Element) -> None:
+        self.el = el
+
+    @property
+    def text(self) -> str:
+        return self.el.text_content()
+
+    def get_attribute(self, name: str) -> str:
+        return self.el.get(name)
+
+    def click(self) -> None:
+        pass
+
+
+class FakeDriver:
+    """Serves a saved place page to scrate's scraping functions offline.
+    Supports page_source, title, element lookups by xpath / css / name /
+    tag and the scripts scrate sends with execute_script.
+
+    Args:
+        page (str): Full html of the saved page
+        url (str): What current_url reports
+    """
+
+    def __init__(
+        self,
+        page: str,
+        url: str = "https://www.google.co.uk/maps/place/Place/"
+        "@37.17,-3.59,17z/",
+    ) -> None:
+        self.page_source = page
+        self.current_url = url
+        self.tree = lxml_html.fromstring(page)
+        self.commands = 0
+
+    @property
+    def title(self) -> str:
+        return self.tree.findtext(".//title") or ""
+
+    def _select(self, by: str, value: str) -> list:
+        self.commands += 1
+        if by == By.XPATH:
+            found = self.tree.xpath(value)
+        elif by == By.CSS_SELECTOR:
+            found = CSSSelector(value)(self.tree)
+        elif by == By.NAME:
+            found = self.tree.xpath("//*[@name=$v]", v=value)
+        elif by == By.TAG_NAME:
+            found = self.tree.xpath("//*[local-name()=$v]", v=value)
+        else:
+            raise ValueError("Unsupported locator {}".format(by))
+        return [FakeElement(el) for el in found]
+
+    def find_elements(self, by: str, value: str) -> list:
+        return self._select(by, value)
+
+    def find_element(self, by: str, value: str) -> FakeElement:
+        found = self._select(by, value)
+        if len(found) == 0:
+            raise NoSuchElementException(value)
+        return found[0]
+
+    def execute_script(self, script: str, *args):
+        self.commands += 1
+        if script == PANE_JS:
+            pane = self.tree.get_element_by_id("pane", None)
+            if pane is None:
+                return [self.title, ""]
+            return [self.title, etree.tostring(pane, encoding="unicode")]
+        if script in (REVIEWS_JS, NEW_REVIEWS_JS):
+            els = self.tree.xpath(args[0])
+            if script == REVIEWS_JS:
+                els = els[: args[1]]
+            else:
+                # mirror the in-page tagging of reviews already returned
+                els = [el for el in els if el.get("data-scrate-seen") is None]
+                for el in els:
+                    el.set("data-scrate-seen", "1")
+            out = []
+            for el in els:
+                stars = CSSSelector("span[aria-label*='stars']")(el)
+                out.append(
+                    {
+                        "id": el.get("data-review-id") or "",
+                        "text": "\n".join(
+                            t.strip() for t in el.itertext() if t.strip()
+                        ),
+                        "stars": stars[0].get("aria-label") if stars else "",
+                    }
+                )
+            return json.dumps(out)
+        # scrolls, clicks etc. have nothing to do offline
+        return None
@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+# times importing scrate's browser-free modules in a fresh interpreter and
+# checks none of them drag in the browser stack, run as part of
+# python -m benchmarks.run
+
+# modules offline analysis and re-parse workers import
+CORE_MODULES = ["scrate", "scrate.parse", "scrate.reparse", "scrate.models"]
+
+# packages only the scraping side should ever load
+BROWSER_PACKAGES = ["selenium", "webdriver_manager", "bs4"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "modules": len(sys.modules),
+    "browser": sorted(
+        p for p in {browser!r} if p in sys.modules
+    ),
+}}))
+"""
+
+
+def time_import(module: str, repeat: int) -> dict:
+
+    # best of repeat cold imports, each in a new interpreter
+    runs: List[dict] = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                PROBE.format(module=module, browser=BROWSER_PACKAGES),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        runs.append(json.loads(out.stdout))
+    return {
+        "min_ms": min(r["ms"] for r in runs),
+        "modules": runs[0]["modules"],
+        "browser": runs[0]["browser"],
+    }
+
+
+def run_imports(repeat: int) -> Dict[str, dict]:
+    return {module: time_import(module, repeat) for module in CORE_MODULES}
+
+
+def compare_imports(
+    current: Dict[str, dict], baseline: Dict[str, dict], tolerance: float
+) -> List[str]:
+
+    regressions = []
+    for module, metrics in current.items():
+        # loading browser code at all is a regression whatever the timing
+        if metrics["browser"]:
+            regressions.append(
+                "import {} loads {}".format(
+                    module, ", ".join(metrics["browser"])
+                )
+            )
+        base = baseline.get(module)
+        if base is None:
+            continue
+        if metrics["min_ms"] > base["min_ms"] * (1 + tolerance):
+            regressions.append(
+                "import {} min_ms: {:.1f} vs baseline {:.1f}".format(
+                    module, metrics["min_ms"], base["min_ms"]
+                )
+            )
+    return regressions
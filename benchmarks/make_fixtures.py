@@ -0,0 +1,129 @@
+import gzip
+import os
+import random
+
+# builds the anonymised place pages the benchmarks run against
+# pages mirror the structure scrate parses on a Maps place page (pane,
+# rating rows, popular times days and bars, reviews) padded with the bulk
+# of unrelated markup a real page carries so parse times are realistic
+# python -m benchmarks.make_fixtures
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DAY_KEYS = ["0", "1", "2", "3", "4", "5", "*6"]
+
+
+def hour_label(h: int) -> str:
+    return "{} {}".format((h - 1) % 12 + 1, "AM" if h < 12 else "PM")
+
+
+def filler(rng: random.Random, n: int) -> str:
+    # nested divs standing in for map tiles, menus, scripts etc.
+    parts = []
+    for i in range(n):
+        parts.append(
+            '<div class="f{} x{}" jsaction="mouseover:f.{}"><div><span>'
+            "item {}</span></div></div>".format(
+                rng.randint(0, 99), rng.randint(0, 99), i, i
+            )
+        )
+    return "".join(parts)
+
+
+def popular_times(rng: random.Random, days: int, hours: range) -> str:
+    if days == 0:
+        return ""
+    day_divs = []
+    for key in DAY_KEYS[:days]:
+        bars = "".join(
+            '<div class="bar" aria-label="{}% busy at {}.">'
+            '<div class="fill"></div></div>'.format(
+                rng.randint(0, 100), hour_label(h)
+            )
+            for h in hours
+        )
+        day_divs.append(
+            '<div jsinstance="{}" class="day"><div>{}</div></div>'.format(
+                key, bars
+            )
+        )
+    return (
+        '<div aria-label="Popular times at Place"><div class="chart">'
+        "{}</div></div>".format("".join(day_divs))
+    )
+
+
+def reviews(rng: random.Random, n: int) -> str:
+    divs = []
+    for i in range(n):
+        divs.append(
+            '<div jsan="7.section-review,0.data-review-id" '
+            'data-review-id="rev{:05d}"><div><div>Reviewer {}</div>'
+            "<div>Local Guide · {} reviews</div><div>{} weeks ago</div>"
+            '<span aria-label=" {} stars "></span>'
+            "<div>Review text {}</div></div></div>".format(
+                i, i, rng.randint(1, 500), rng.randint(1, 50),
+                rng.randint(1, 5), i,
+            )
+        )
+    return '<div class="section-scrollbox">{}</div>'.format("".join(divs))
+
+
+def place_page(
+    seed: int, days: int, hours: range, n_reviews: int, n_filler: int
+) -> str:
+    rng = random.Random(seed)
+    rows = "".join(
+        '<tr aria-label="{} stars, {} reviews"><td>{}</td></tr>'.format(
+            s, rng.randint(0, 2000), s
+        )
+        for s in range(5, 0, -1)
+    )
+    pane = (
+        '<div id="pane"><div class="header">'
+        '<button jsaction="pane.rating.category">Restaurant</button>'
+        '<span aria-label="Price: Moderate">££</span>'
+        '<button jsaction="pane.rating.moreReviews">{:,} reviews</button>'
+        '<ol aria-label=" 4.4 stars "></ol></div>'
+        "<table>{}</table>"
+        '<div aria-label="Saturday, 9AM to 11PM; Sunday, 10AM to 10PM; '
+        'Monday, Closed. Hide open hours for the week"></div>'
+        "{}"
+        '<button aria-label="More reviews (1,234)"></button>'
+        "{}{}</div>"
+    ).format(
+        rng.randint(100, 5000),
+        rows,
+        popular_times(rng, days, hours),
+        reviews(rng, n_reviews),
+        filler(rng, n_filler // 10),
+    )
+    return (
+        "<html><head><title>Place {} - Google Maps</title></head><body>"
+        '<div id="app">{}</div>{}</body></html>'
+    ).format(seed, filler(rng, n_filler), pane)
+
+
+FIXTURES = {
+    # few bars: a couple of days with a handful of opening hours
+    "few_bars": dict(seed=1, days=2, hours=range(11, 15), n_reviews=10,
+                     n_filler=2000),
+    # many bars: full week, every hour
+    "many_bars": dict(seed=2, days=7, hours=range(0, 24), n_reviews=10,
+                      n_filler=2000),
+    # no popular times chart at all
+    "no_popular_times": dict(seed=3, days=0, hours=range(0), n_reviews=10,
+                             n_filler=2000),
+    # reviews section loaded with many reviews
+    "many_reviews": dict(seed=4, days=7, hours=range(6, 24), n_reviews=500,
+                         n_filler=2000),
+}
+
+
+if __name__ == "__main__":
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, spec in FIXTURES.items():
+        path = os.path.join(FIXTURE_DIR, name + ".html.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as fd:
+            fd.write(place_page(**spec))
+        print("wrote {}".format(path))
@@ -0,0 +1,230 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.fake_driver import FakeDriver, fixture_names, load_fixture
+from benchmarks.import_time import compare_imports, run_imports
+from scrate.extract import extract_all
+from scrate.popular_times import parse_popular_times, scrape_popular_times
+from scrate.reviews import extract_reviews
+from scrate.scrape import (
+    get_rating_dist,
+    parse_general_info,
+    scrape_general_info,
+)
+from scrate.snapshot import take_snapshot
+
+# times scrate's parsing functions against the saved pages in fixtures/
+# and compares them to a stored baseline so regressions show up
+# python -m benchmarks.run [--save-baseline]
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class Fixture:
+    """A saved page with the fake driver and snapshot for it built up front
+    so the benchmarks time scrate's parsing and not the fixture set up
+    """
+
+    def __init__(self, page: str) -> None:
+        self.page = page
+        self.driver = FakeDriver(page)
+        self.snapshot = take_snapshot(self.driver)
+
+
+def bench_snapshot(fx: Fixture) -> None:
+    take_snapshot(fx.driver)
+
+
+def bench_general_info(fx: Fixture) -> None:
+    scrape_general_info(fx.driver)
+
+
+def bench_general_info_snapshot(fx: Fixture) -> None:
+    # with the snapshot already taken, as scrape_location does
+    parse_general_info(fx.snapshot)
+
+
+def bench_rating_dist(fx: Fixture) -> None:
+    # from the full page source as the original callers did
+    get_rating_dist(fx.page)
+
+
+def bench_parse_popular_times(fx: Fixture) -> None:
+    for chart in extract_all(fx.snapshot.tree, "popular_times"):
+        for day in extract_all(chart, "popular_times_days"):
+            parse_popular_times(day)
+
+
+def bench_popular_times(fx: Fixture) -> None:
+    scrape_popular_times(fx.driver)
+
+
+def bench_reviews(fx: Fixture) -> None:
+    extract_reviews(fx.driver, 1000)
+
+
+BENCHES: Dict[str, Callable[[Fixture], None]] = {
+    "take_snapshot": bench_snapshot,
+    "scrape_general_info": bench_general_info,
+    "parse_general_info": bench_general_info_snapshot,
+    "get_rating_dist": bench_rating_dist,
+    "parse_popular_times": bench_parse_popular_times,
+    "scrape_popular_times": bench_popular_times,
+    "extract_reviews": bench_reviews,
+}
+
+
+def time_call(
+    fn: Callable[[Fixture], None], fx: Fixture, repeat: int
+) -> dict:
+
+    # warm up once then take the median of repeat timed calls
+    fn(fx)
+    timings: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn(fx)
+        timings.append(time.perf_counter() - start)
+    # peak python heap of a single call, lxml's own C allocations aside
+    gc.collect()
+    tracemalloc.start()
+    fn(fx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run(repeat: int) -> dict:
+
+    pages = {name: Fixture(load_fixture(name)) for name in fixture_names()}
+    per_page: Dict[str, dict] = {}
+    for name, fx in pages.items():
+        per_page[name] = {
+            bench: time_call(fn, fx, repeat) for bench, fn in BENCHES.items()
+        }
+    # bulk: every page back to back, as a scrape or re-parse would
+    bulk: Dict[str, dict] = {}
+    for bench, fn in BENCHES.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for fx in pages.values():
+                fn(fx)
+        elapsed = time.perf_counter() - start
+        bulk[bench] = {"pages_per_s": repeat * len(pages) / elapsed}
+    # cold imports are slow to repeat so take fewer of them
+    imports = run_imports(min(repeat, 5))
+    return {"per_page": per_page, "bulk": bulk, "imports": imports}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+
+    # metrics more than tolerance worse than the baseline
+    # min rather than median time as it is the least noisy between runs
+    regressions = []
+    for page, benches in current["per_page"].items():
+        for bench, metrics in benches.items():
+            base = baseline.get("per_page", {}).get(page, {}).get(bench)
+            if base is None:
+                continue
+            for metric in ("min_ms", "peak_kb"):
+                if metrics[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(
+                        "{} {} {}: {:.2f} vs baseline {:.2f}".format(
+                            page, bench, metric, metrics[metric], base[metric]
+                        )
+                    )
+    for bench, metrics in current["bulk"].items():
+        base = baseline.get("bulk", {}).get(bench)
+        if base is None:
+            continue
+        if metrics["pages_per_s"] < base["pages_per_s"] / (1 + tolerance):
+            regressions.append(
+                "bulk {} pages_per_s: {:.1f} vs baseline {:.1f}".format(
+                    bench, metrics["pages_per_s"], base["pages_per_s"]
+                )
+            )
+    regressions += compare_imports(
+        current["imports"], baseline.get("imports", {}), tolerance
+    )
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    for page, benches in results["per_page"].items():
+        print(page)
+        for bench, m in benches.items():
+            print(
+                "  {:<22} {:>9.2f} ms median {:>9.2f} ms min {:>10.1f} KiB "
+                "peak".format(bench, m["median_ms"], m["min_ms"], m["peak_kb"])
+            )
+    print("bulk")
+    for bench, m in results["bulk"].items():
+        print("  {:<22} {:>9.1f} pages/s".format(bench, m["pages_per_s"]))
+    print("imports")
+    for module, m in results["imports"].items():
+        print(
+            "  {:<22} {:>9.1f} ms min {:>6} modules{}".format(
+                module,
+                m["min_ms"],
+                m["modules"],
+                " loads " + ", ".join(m["browser"]) if m["browser"] else "",
+            )
+        )
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark scrate's parsers against saved pages"
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the new baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="fraction slower than baseline counted as a regression",
+    )
+    parser.add_argument("--output", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(results, fd, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as fd:
+            json.dump(results, fd, indent=2)
+        print("Saved baseline to {}".format(args.baseline))
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, skipping comparison".format(args.baseline))
+        return 0
+    with open(args.baseline) as fd:
+        baseline = json.load(fd)
+    regressions = compare(results, baseline, args.tolerance)
+    for r in regressions:
+        print("REGRESSION {}".format(r))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,11 @@
+import atexit
+import importlib
 import logging
+import logging.handlers
 import os
+import queue
+import sys
+from typing import Any, List, Optional, Tuple
 
 
 def get_root_dir() -> str:
@@ -22,6 +28,114 @@ def get_root_dir() -> str:
     return "/".join(root_dir)
 
 
+# logging is configured once per process from these environment variables
+# or by calling configure_logging
+LOG_LEVEL_ENV = "SCRATE_LOG_LEVEL"
+LOG_PATH_ENV = "SCRATE_LOG_PATH"
+LOG_FORMAT = "%(asctime)s %(process)d %(name)-12s %(levelname)-8s %(message)s"
+
+# queue handler shared by every scrate logger in this process, the
+# listener thread that does the writing, the loggers the handler is on and
+# the settings it was made with
+_handler: Optional[logging.handlers.QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_attached: List[logging.Logger] = []
+_settings: Tuple[Optional[str], Optional[str]] = (None, None)
+_pid: Optional[int] = None
+
+
+def default_log_path() -> str:
+    return os.path.join(get_root_dir(), "logs", "scrate.log")
+
+
+def _file_handler(path: str) -> logging.Handler:
+    # log to path, or to stderr if the file can't be opened
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return logging.FileHandler(path)
+    except OSError as e:
+        sys.stderr.write(
+            "scrate cannot log to {} ({}), using stderr\n".format(path, e)
+        )
+        return logging.StreamHandler()
+
+
+def _attach(logger: logging.Logger) -> None:
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+        _attached.append(logger)
+
+
+def stop_logging() -> None:
+    """Writes out anything still queued and stops the background writer"""
+    global _listener
+    if _listener is not None and _pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+
+
+def configure_logging(
+    level: Optional[str] = None, path: Optional[str] = None
+) -> logging.Handler:
+    """Sets up scrate's logging for this process. Records go on a queue
+    and a background thread writes them, so a slow disk never holds up a
+    scrape. Called on first use of get_module_logger, call again to change
+    the level or file.
+
+    Args:
+        level (str): Level name e.g. 'INFO', defaults to $SCRATE_LOG_LEVEL
+            or DEBUG
+        path (str): File to log to, defaults to $SCRATE_LOG_PATH or
+            logs/scrate.log under the repo, its directory is created
+
+    Returns:
+        logging.Handler: The queue handler scrate's loggers write to
+    """
+    global _handler, _listener, _settings, _pid
+    stop_logging()
+    _settings = (level, path)
+    level = level or os.environ.get(LOG_LEVEL_ENV, "DEBUG")
+    path = path or os.environ.get(LOG_PATH_ENV) or default_log_path()
+    writer = _file_handler(path)
+    writer.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, writer)
+    _listener.start()
+    _pid = os.getpid()
+    # move every logger over from the old handler to the new one
+    loggers = _attached[:] or [logging.getLogger("scrate")]
+    for logger in loggers:
+        if _handler is not None:
+            logger.removeHandler(_handler)
+    _attached.clear()
+    _handler = handler
+    for logger in loggers:
+        _attach(logger)
+        logger.setLevel(level.upper())
+    return handler
+
+
+def _after_fork() -> None:
+    # a forked worker inherits the handler but not the listener thread, so
+    # it gets its own writer, one per process
+    if _handler is not None:
+        configure_logging(*_settings)
+        # multiprocessing children leave through os._exit, skipping atexit
+        util = sys.modules.get("multiprocessing.util")
+        if util is not None:
+            util.register_after_fork(_handler, _stop_at_process_exit)
+
+
+def _stop_at_process_exit(handler: logging.Handler) -> None:
+    # run in a multiprocessing child once it has cleared the exit hooks it
+    # inherited, flushing the log after any other hook that might log
+    util = sys.modules["multiprocessing.util"]
+    util.Finalize(None, stop_logging, exitpriority=-100)
+
+
 def get_module_logger(mod_name: str) -> logging.Logger:
     """Creates logger instance for re-use within each module
 
@@ -31,16 +145,45 @@ def get_module_logger(mod_name: str) -> logging.Logger:
     Returns:
         logging.Logger: Logger instance to be used to write
     """
-    # create logger
+    if _handler is None:
+        configure_logging()
     logger = logging.getLogger(mod_name)
-    # create file handler, get file address and add
-    log_fd = get_root_dir() + "/logs/scrate.log"
-    fd = logging.FileHandler(log_fd)
-    logger.addHandler(fd)
-    # create log format and add
-    fmt = "%(asctime)s %(name)-12s %(levelname)-8s %(message)s"
-    formatter = logging.Formatter(fmt)
-    fd.setFormatter(formatter)
-    # set logging level
-    logger.setLevel(logging.DEBUG)
+    # scrate.* loggers pass records up to the 'scrate' logger's handler,
+    # others e.g. __main__ get the handler themselves
+    if mod_name != "scrate" and not mod_name.startswith("scrate."):
+        _attach(logger)
+        logger.setLevel(logging.getLogger("scrate").level)
     return logger
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_after_fork)
+
+
+# public names loaded from their module on first use, so importing scrate
+# (or its parsing core, scrate.parse) never pulls in selenium
+LAZY_ATTRS = {
+    "search_location": "scrate.search",
+    "search_locations": "scrate.search",
+    "iter_search": "scrate.search",
+    "search_area": "scrate.search",
+    "SearchOptions": "scrate.search",
+    "plan_tiles": "scrate.tiles",
+    "SessionPool": "scrate.pool",
+    "DriverConfig": "scrate.driver",
+    "parse_place": "scrate.parse",
+    "parse_general_info": "scrate.parse",
+    "get_rating_dist": "scrate.parse",
+    "parse_geo": "scrate.parse",
+    "get_popular_times": "scrate.popular_times",
+    "PlaceSnapshot": "scrate.snapshot",
+    "Place": "scrate.models",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in LAZY_ATTRS:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    return getattr(importlib.import_module(LAZY_ATTRS[name]), name)
@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from scrate import get_module_logger
+from scrate.snapshot import PlaceSnapshot
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    pid TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def encode_snapshot(snapshot: PlaceSnapshot) -> bytes:
+    # gzipped json of everything needed to rebuild the snapshot
+    payload = json.dumps({"title": snapshot.title, "html": snapshot.html})
+    # mtime fixed so identical pages compress to identical bytes
+    return gzip.compress(payload.encode("utf-8"), mtime=0)
+
+
+def decode_snapshot(blob: bytes) -> PlaceSnapshot:
+    payload = json.loads(gzip.decompress(blob).decode("utf-8"))
+    return PlaceSnapshot(payload["title"], payload["html"])
+
+
+class PageCache:
+    """Compressed on-disk cache of the pane html captured for each place,
+    so extractors can be re-run later without a browser. Pages are stored
+    once per distinct content (by sha256) and indexed by place id.
+
+    Args:
+        directory (str): Directory to keep the cache in, created if missing
+        ttl (float): Seconds before an entry expires, None to keep forever
+        max_bytes (int): Evict least recently used pages once the stored
+            pages take more than this many bytes, None for no limit
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "index.db"), timeout=60
+        )
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def object_path(self, digest: str) -> str:
+        # fan out by first two hex chars to keep directories small
+        return os.path.join(
+            self.directory, "objects", digest[:2], digest + ".json.gz"
+        )
+
+    def put(self, pid: str, snapshot: PlaceSnapshot) -> str:
+        blob = encode_snapshot(snapshot)
+        digest = hashlib.sha256(blob).hexdigest()
+        path = self.object_path(digest)
+        # identical content is only ever written once
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as fd:
+                fd.write(blob)
+            os.replace(tmp_path, path)
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?)",
+                (digest, len(blob)),
+            )
+            old = self.conn.execute(
+                "SELECT digest FROM entries WHERE pid = ?", (pid,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (pid, digest, now, now),
+            )
+        if old is not None and old[0] != digest:
+            self._drop_unreferenced(old[0])
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+        return digest
+
+    def get(self, pid: str) -> Optional[PlaceSnapshot]:
+        row = self.conn.execute(
+            "SELECT digest, created FROM entries WHERE pid = ?", (pid,)
+        ).fetchone()
+        if row is None:
+            return None
+        digest, created = row
+        if self.ttl is not None and time.time() - created > self.ttl:
+            self.delete(pid)
+            return None
+        try:
+            with open(self.object_path(digest), "rb") as fd:
+                snapshot = decode_snapshot(fd.read())
+        except FileNotFoundError:
+            logger.error("Cache object missing for %s", pid)
+            self.delete(pid)
+            return None
+        with self.conn:
+            self.conn.execute(
+                "UPDATE entries SET accessed = ? WHERE pid = ?",
+                (time.time(), pid),
+            )
+        return snapshot
+
+    def pids(self) -> List[str]:
+        # every live place id in the cache, dropping expired ones first
+        self.expire()
+        rows = self.conn.execute("SELECT pid FROM entries ORDER BY pid")
+        return [row[0] for row in rows]
+
+    def paths(self) -> List[tuple]:
+        # (pid, object path) pairs so pages can be read without the index
+        self.expire()
+        return [
+            (pid, self.object_path(digest))
+            for pid, digest in self.conn.execute(
+                "SELECT pid, digest FROM entries ORDER BY pid"
+            )
+        ]
+
+    def delete(self, pid: str) -> None:
+        row = self.conn.execute(
+            "SELECT digest FROM entries WHERE pid = ?", (pid,)
+        ).fetchone()
+        if row is None:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE pid = ?", (pid,))
+        self._drop_unreferenced(row[0])
+
+    def expire(self) -> int:
+        # remove entries older than the ttl, returning how many went
+        if self.ttl is None:
+            return 0
+        cutoff = time.time() - self.ttl
+        expired = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT pid FROM entries WHERE created < ?", (cutoff,)
+            )
+        ]
+        for pid in expired:
+            self.delete(pid)
+        return len(expired)
+
+    def size(self) -> int:
+        # total compressed bytes of stored pages
+        row = self.conn.execute("SELECT SUM(size) FROM objects").fetchone()
+        return row[0] or 0
+
+    def evict(self, max_bytes: int) -> int:
+        # drop least recently used entries until under max_bytes
+        evicted = 0
+        total = self.size()
+        while total > max_bytes:
+            row = self.conn.execute(
+                "SELECT pid FROM entries ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self.delete(row[0])
+            evicted += 1
+            total = self.size()
+        if evicted > 0:
+            logger.info(
+                "Evicted %s pages from cache, %s bytes remain", evicted, total
+            )
+        return evicted
+
+    def _drop_unreferenced(self, digest: str) -> None:
+        # remove a stored page once no place points at it
+        row = self.conn.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if row is not None:
+            return
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM objects WHERE digest = ?", (digest,)
+            )
+        try:
+            os.remove(self.object_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,84 @@
+import re
+from typing import TYPE_CHECKING, List, Tuple
+
+from lxml import etree
+
+from scrate.extract import Document, as_tree
+from scrate.metrics import get_metrics
+
+if TYPE_CHECKING:
+    from selenium.webdriver import Chrome
+
+# every result card's link, name and html in one round trip, the card
+# being the element holding the place link and the summary shown with it
+CARDS_JS = """
+const found = document.evaluate(
+    arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+);
+const cards = [];
+for (let i = 0; i < found.snapshotLength; i++) {
+    const link = found.snapshotItem(i);
+    const card = link.parentElement || link;
+    cards.push([
+        link.getAttribute("href"),
+        link.getAttribute("aria-label") || "",
+        card.outerHTML,
+    ]);
+}
+return cards;
+"""
+
+# summary fields on a result card, relative to the card
+CARD_XPATHS = {
+    # e.g. '4.5 stars 1,234 Reviews'
+    "rating": etree.XPath(
+        "string((.//*[@role='img' and contains(@aria-label, 'star')])[1]"
+        "/@aria-label)"
+    ),
+    "price": etree.XPath(
+        "string((.//span[contains(@aria-label, 'Price')])[1])"
+    ),
+    # leaf text of the card's detail lines, the category comes first
+    "details": etree.XPath(
+        ".//div[contains(@class, 'W4Efsd')]//span[not(*)]/text()"
+    ),
+}
+
+RATING_RE = re.compile(r"([\d.]+) stars?(?: ([\d,]+) [Rr]eviews?)?")
+
+
+def parse_card(name: str, card: Document) -> dict:
+
+    # the general info structure of a place from its result card alone
+    # fields only on the place page (rating_dist, opening_hours) are empty
+    tree = as_tree(card)
+    general_info = {"name": name, "category": ""}
+    # first detail that isn't a separator, rating, price or address number
+    for text in CARD_XPATHS["details"](tree):
+        text = text.strip()
+        if text in ("", "·") or text[0].isdigit() or text[0] in "(€$£¥":
+            continue
+        general_info["category"] = text
+        break
+    general_info["price"] = len(str(CARD_XPATHS["price"](tree)).strip())
+    found = RATING_RE.search(str(CARD_XPATHS["rating"](tree)))
+    if found is None:
+        general_info["review_count"] = 0
+    else:
+        general_info["review_count"] = int(
+            (found[2] or "0").replace(",", "")
+        )
+        general_info["rating"] = float(found[1])
+    general_info["rating_dist"] = []
+    general_info["opening_hours"] = []
+    return general_info
+
+
+def harvest_cards(
+    driver: "Chrome", places_xp: str
+) -> List[Tuple[str, dict]]:
+
+    # (href, general info) for every result card loaded, one command
+    cards = driver.execute_script(CARDS_JS, places_xp) or []
+    get_metrics().transfer(sum(len(html) for _, _, html in cards))
+    return [(href, parse_card(name, html)) for href, name, html in cards]
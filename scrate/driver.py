@@ -0,0 +1,140 @@
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from selenium.webdriver import Chrome, ChromeOptions
+from selenium.webdriver.chrome.service import Service
+
+from scrate import get_module_logger
+from scrate.metrics import instrument_driver
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# where the resolved chromedriver binary path is remembered between runs
+DRIVER_CACHE = os.path.join(
+    os.path.expanduser("~"), ".cache", "scrate", "chromedriver.json"
+)
+
+# url patterns blocked for each resource type we can turn off
+RESOURCE_PATTERNS = {
+    "image": [
+        "*.png",
+        "*.jpg",
+        "*.jpeg",
+        "*.gif",
+        "*.webp",
+        "*.svg",
+        "*.ico",
+        "*googleusercontent.com/*",
+    ],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.gstatic.com/*"],
+    "media": ["*.mp4", "*.webm", "*.mp3", "*.ogg"],
+    # the map canvas itself, none of which we parse
+    "tile": ["*/maps/vt?*", "*/maps/vt/*", "*/kh/v=*", "*/maps/tactile/*"],
+}
+
+
+class DriverConfig:
+    """How to start Chrome
+
+    Args:
+        headless (bool): Run without a window
+        block (Sequence[str]): Resource types from RESOURCE_PATTERNS not to
+            download e.g. ('image', 'font', 'tile')
+        window_size (Tuple[int, int]): Browser window size in pixels
+        page_load_strategy (str): 'normal' waits for every subresource,
+            'eager' returns once the DOM is ready
+        driver_path (str): chromedriver binary to use, resolved and cached
+            with webdriver_manager if not given
+    """
+
+    def __init__(
+        self,
+        headless: bool = False,
+        block: Sequence[str] = (),
+        window_size: Tuple[int, int] = (1920, 1080),
+        page_load_strategy: str = "normal",
+        driver_path: Optional[str] = None,
+    ) -> None:
+        unknown = set(block) - set(RESOURCE_PATTERNS)
+        if unknown:
+            raise ValueError(
+                "Unknown resource types to block: {}".format(sorted(unknown))
+            )
+        self.headless = headless
+        self.block = tuple(block)
+        self.window_size = window_size
+        self.page_load_strategy = page_load_strategy
+        self.driver_path = driver_path
+
+
+# headless, no images, fonts, media or map tiles: what a scrape needs
+LIGHT = DriverConfig(
+    headless=True,
+    block=("image", "font", "media", "tile"),
+    page_load_strategy="eager",
+)
+
+
+def resolve_driver_path(cache_file: str = DRIVER_CACHE) -> str:
+
+    # reuse the chromedriver found on an earlier run if it is still there
+    # so we only hit the network the first time
+    try:
+        with open(cache_file) as fd:
+            path = json.load(fd)["path"]
+        if os.path.exists(path):
+            return path
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    # import here as webdriver_manager is only needed to find the binary
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    logger.info("Resolving chromedriver binary, installing...")
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, "w") as fd:
+        json.dump({"path": path}, fd)
+    return path
+
+
+def chrome_options(config: DriverConfig) -> ChromeOptions:
+
+    options = ChromeOptions()
+    options.page_load_strategy = config.page_load_strategy
+    options.add_argument("--window-size={},{}".format(*config.window_size))
+    if config.headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-dev-shm-usage")
+    if "image" in config.block:
+        # stops images being decoded as well as downloaded
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+    return options
+
+
+def blocked_patterns(config: DriverConfig) -> List[str]:
+    # url patterns for every resource type the config turns off
+    return [p for r in config.block for p in RESOURCE_PATTERNS[r]]
+
+
+def create_driver(config: Optional[DriverConfig] = None) -> Chrome:
+
+    # create chrome driver instance and start
+    config = config or DriverConfig()
+    driver_path = config.driver_path or resolve_driver_path()
+    driver = Chrome(
+        service=Service(driver_path), options=chrome_options(config)
+    )
+    # block what we don't need at the network layer
+    patterns = blocked_patterns(config)
+    if patterns:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    # count webdriver commands for metrics, free while they're disabled
+    instrument_driver(driver)
+    return driver
@@ -0,0 +1,78 @@
+from typing import TYPE_CHECKING, Dict, List, Union
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# everything we pull out of a place pane, as xpaths compiled once at import
+# and evaluated against an lxml tree of the pane (or the whole page)
+PANE_XP = "//div[@id='pane']"
+CATEGORY_XP = "//button[@jsaction='pane.rating.category']"
+PRICE_XP = "//span[contains(@aria-label, 'Price')]"
+REVIEW_COUNT_XP = "//button[@jsaction='pane.rating.moreReviews']"
+RATING_XP = "//ol[contains(@aria-label, 'stars')]"
+OPENING_HOURS_XP = "//div[contains(@aria-label, 'Saturday')]"
+
+
+def _first_text(xp: str) -> etree.XPath:
+    # text of first match in the pane, '' if none
+    return etree.XPath("string(({}{})[1])".format(PANE_XP, xp))
+
+
+def _first_al(xp: str) -> etree.XPath:
+    # aria-label of first match in the pane, '' if none
+    return etree.XPath("string(({}{})[1]/@aria-label)".format(PANE_XP, xp))
+
+
+XPATHS: Dict[str, etree.XPath] = {
+    # text fields
+    "category": _first_text(CATEGORY_XP),
+    "price": _first_text(PRICE_XP),
+    "review_count": _first_text(REVIEW_COUNT_XP),
+    # aria-label fields
+    "rating": _first_al(RATING_XP),
+    "opening_hours": _first_al(OPENING_HOURS_XP),
+    # rating distribution rows e.g. '5 stars, 120 reviews'
+    "rating_dist": etree.XPath(
+        PANE_XP + "//tr[contains(@aria-label, 'stars')]/@aria-label"
+    ),
+    # popular times chart containers
+    "popular_times": etree.XPath(
+        PANE_XP + "//div[contains(@aria-label, 'Popular times at')]"
+    ),
+    # day divs within a popular times chart, indexed by jsinstance
+    "popular_times_days": etree.XPath(".//div[@jsinstance]"),
+    # hourly bars within a day div e.g. '45% busy at 6 PM.'
+    "busyness": etree.XPath(
+        ".//div[contains(@aria-label, 'busy')]/@aria-label"
+    ),
+}
+
+if TYPE_CHECKING:
+    # bs4 objects are accepted but bs4 itself isn't needed to parse
+    from bs4 import BeautifulSoup
+    from bs4.element import Tag
+
+Document = Union[str, bytes, "BeautifulSoup", "Tag", etree._Element]
+
+
+def as_tree(doc: Document) -> etree._Element:
+    # lets the extractors be used as a drop in wherever a bs4 object,
+    # raw html or an already parsed lxml tree is to hand
+    if isinstance(doc, etree._Element):
+        return doc
+    if doc is not None and not isinstance(doc, (str, bytes)):
+        # bs4 objects give back their html
+        doc = str(doc)
+    if not doc or not doc.strip():
+        # lxml refuses to parse an empty document
+        doc = "<div></div>"
+    return lxml_html.fromstring(doc)
+
+
+def extract_text(tree: etree._Element, field: str) -> str:
+    # string xpaths return '' rather than raising when nothing matches
+    return str(XPATHS[field](tree))
+
+
+def extract_all(tree: etree._Element, field: str) -> List:
+    return list(XPATHS[field](tree))
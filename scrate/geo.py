@@ -0,0 +1,47 @@
+import re
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# mean earth radius in km
+EARTH_RADIUS_KM = 6371.0088
+
+# a place link's data carries the place's own position as !3d<lat>!4d<lng>
+COORDS_RE = re.compile(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)")
+
+
+def href_coords(href: Optional[str]) -> Tuple[float, float]:
+    # (lat, lng) of the place a maps link points at, nan if not in the link
+    found = COORDS_RE.search(href or "")
+    if found is None:
+        return (np.nan, np.nan)
+    return (float(found[1]), float(found[2]))
+
+
+def haversine_km(
+    coords: np.ndarray, origin: Tuple[float, float]
+) -> np.ndarray:
+
+    # great circle distance in km from origin to each (lat, lng) row
+    lat, lng = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    lat0, lng0 = np.radians(origin[0]), np.radians(origin[1])
+    a = (
+        np.sin((lat - lat0) / 2) ** 2
+        + np.cos(lat0) * np.cos(lat) * np.sin((lng - lng0) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def within_km(
+    hrefs: Sequence[Optional[str]],
+    origin: Tuple[float, float],
+    max_km: float,
+) -> np.ndarray:
+
+    # which of the linked places are within max_km of origin, all at once
+    # a link without coordinates is kept as we can't say it is too far
+    if len(hrefs) == 0:
+        return np.zeros(0, dtype=bool)
+    coords = np.array([href_coords(h) for h in hrefs], dtype=float)
+    distances = haversine_km(coords, origin)
+    return np.isnan(distances) | (distances <= max_km)
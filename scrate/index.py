@@ -0,0 +1,133 @@
+import pickle
+import re
+import sqlite3
+from typing import Dict, List, Optional
+
+from scrate import get_module_logger
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# the feature id in a place link's data, e.g. !1s0x12a:0x5b3, which stays
+# the same however the place was reached, unlike the viewport in the url
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    pid TEXT NOT NULL,
+    query TEXT NOT NULL,
+    PRIMARY KEY (pid, query)
+);
+CREATE TABLE IF NOT EXISTS places (
+    pid TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+
+def place_id(href: Optional[str]) -> Optional[str]:
+    # stable id of the place a maps link points at, None if it has none
+    found = FEATURE_ID_RE.search(href or "")
+    if found is None:
+        return None
+    return found[1].lower()
+
+
+def place_key(href: Optional[str]) -> str:
+    # key for a place from a result's link or a place url, the feature id
+    # where there is one, else the link without the query string, which
+    # changes between searches (authuser, hl, rclk...)
+    pid = place_id(href)
+    if pid is not None:
+        return pid
+    logger.error("No place id in %s, keying by link", href)
+    return (href or "").split("?")[0]
+
+
+class PlaceIndex:
+    """Places already scraped, keyed by place id so a place is recognised
+    from its link in the results list and not opened a second time, along
+    with every query that matched each place. Shared between the queries
+    of a batch and, given a path, kept in sqlite between runs along with
+    each place scraped, so a later run can return places it doesn't open.
+
+    Args:
+        path (str): SQLite file to persist the index in, None to keep it
+            in memory only
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.queries: Dict[str, List[str]] = {}
+        self.conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self.conn = sqlite3.connect(path, timeout=60)
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+            for pid, query in self.conn.execute(
+                "SELECT pid, query FROM matches ORDER BY rowid"
+            ):
+                self.queries.setdefault(pid, []).append(query)
+
+    def __contains__(self, pid: str) -> bool:
+        return pid in self.queries
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def add(self, pid: str, query: str, place: Optional[dict] = None) -> None:
+        # a place scraped for query, kept when the index is in sqlite
+        self.queries.setdefault(pid, [])
+        if self.conn is not None and place is not None:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO places VALUES (?, ?)",
+                    (
+                        pid,
+                        pickle.dumps(place, protocol=pickle.HIGHEST_PROTOCOL),
+                    ),
+                )
+        self.match(pid, query)
+
+    def match(self, pid: str, query: str) -> bool:
+        # whether the place has already been scraped, noting that it also
+        # matched query if so
+        queries = self.queries.get(pid)
+        if queries is None:
+            return False
+        if query not in queries:
+            queries.append(query)
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO matches VALUES (?, ?)",
+                        (pid, query),
+                    )
+        return True
+
+    def count(self, query: str) -> int:
+        # places matched by query, scraped for it or found by it again
+        return sum(query in queries for queries in self.queries.values())
+
+    def queries_for(self, pid: str) -> List[str]:
+        return list(self.queries.get(pid, []))
+
+    def pids_for(self, query: str) -> List[str]:
+        # places matched by query, in the order they were indexed
+        return [
+            pid for pid, queries in self.queries.items() if query in queries
+        ]
+
+    def load_place(self, pid: str) -> Optional[dict]:
+        # the place as an earlier run scraped it, None if not kept
+        if self.conn is None:
+            return None
+        row = self.conn.execute(
+            "SELECT data FROM places WHERE pid = ?", (pid,)
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
@@ -0,0 +1,230 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, Optional
+
+from scrate import get_module_logger
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+
+class Counters:
+    """Timings and counts for one place, or summed over a run"""
+
+    def __init__(self) -> None:
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.commands: Dict[str, int] = defaultdict(int)
+        self.delay_seconds: Dict[str, float] = defaultdict(float)
+        self.page_bytes = 0
+
+    def merge(self, other: "Counters") -> None:
+        for k, v in other.stage_seconds.items():
+            self.stage_seconds[k] += v
+        for k, n in other.stage_calls.items():
+            self.stage_calls[k] += n
+        for k, n in other.commands.items():
+            self.commands[k] += n
+        for k, v in other.delay_seconds.items():
+            self.delay_seconds[k] += v
+        self.page_bytes += other.page_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": {
+                k: {"seconds": v, "calls": self.stage_calls[k]}
+                for k, v in self.stage_seconds.items()
+            },
+            "commands": dict(self.commands),
+            "commands_total": sum(self.commands.values()),
+            "page_bytes": self.page_bytes,
+            "delay_seconds": dict(self.delay_seconds),
+            "delay_seconds_total": sum(self.delay_seconds.values()),
+        }
+
+
+class Metrics:
+    """Records wall time per stage, webdriver commands issued, bytes of page
+    html transferred and time spent in deliberate delays, per place and
+    for the whole run. Enable with enable_metrics(), then export with
+    write_json() / write_prometheus().
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.run = Counters()
+        self.places: Dict[str, Counters] = {}
+        self.current = Counters()
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # time the enclosed block against the named stage
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current.stage_seconds[name] += time.perf_counter() - start
+            self.current.stage_calls[name] += 1
+
+    def command(self, name: str) -> None:
+        self.current.commands[name] += 1
+
+    def transfer(self, n_bytes: int) -> None:
+        self.current.page_bytes += n_bytes
+
+    def delay(self, stage: str, seconds: float) -> None:
+        self.current.delay_seconds[stage] += seconds
+
+    def end_place(self, pid: Optional[str] = None) -> None:
+        # close off everything recorded since the last place, keeping it
+        # against pid if the place was scraped
+        if pid is not None:
+            self.places[pid] = self.current
+        self.run.merge(self.current)
+        self.current = Counters()
+
+    def merge(self, other: "Metrics") -> None:
+        # add in what another recorder has, e.g. a worker process's
+        self.run.merge(other.run)
+        self.run.merge(other.current)
+        self.places.update(other.places)
+
+    def summary(self) -> dict:
+        run = Counters()
+        run.merge(self.run)
+        # include anything recorded since the last place e.g. pagination
+        run.merge(self.current)
+        summary = run.to_dict()
+        summary["places_total"] = len(self.places)
+        summary["elapsed_seconds"] = time.time() - self.started
+        return {
+            "run": summary,
+            "places": {pid: c.to_dict() for pid, c in self.places.items()},
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as fd:
+            json.dump(self.summary(), fd, indent=2)
+
+    def write_prometheus(self, path: str) -> None:
+        # prometheus text exposition format, e.g. for the node exporter
+        # textfile collector, written to a temp file then moved into place
+        run = self.summary()["run"]
+        lines = [
+            "# HELP scrate_stage_seconds_total Wall time spent per stage",
+            "# TYPE scrate_stage_seconds_total counter",
+        ]
+        for stage, v in run["stages"].items():
+            lines.append(
+                'scrate_stage_seconds_total{{stage="{}"}} {}'.format(
+                    stage, v["seconds"]
+                )
+            )
+        lines += [
+            "# HELP scrate_stage_calls_total Times each stage was run",
+            "# TYPE scrate_stage_calls_total counter",
+        ]
+        for stage, v in run["stages"].items():
+            lines.append(
+                'scrate_stage_calls_total{{stage="{}"}} {}'.format(
+                    stage, v["calls"]
+                )
+            )
+        lines += [
+            "# HELP scrate_webdriver_commands_total WebDriver commands sent",
+            "# TYPE scrate_webdriver_commands_total counter",
+        ]
+        for command, n in run["commands"].items():
+            lines.append(
+                'scrate_webdriver_commands_total{{command="{}"}} {}'.format(
+                    command, n
+                )
+            )
+        lines += [
+            "# HELP scrate_delay_seconds_total Time spent waiting per stage",
+            "# TYPE scrate_delay_seconds_total counter",
+        ]
+        for stage, v in run["delay_seconds"].items():
+            lines.append(
+                'scrate_delay_seconds_total{{stage="{}"}} {}'.format(stage, v)
+            )
+        lines += [
+            "# HELP scrate_page_bytes_total Bytes of page html transferred",
+            "# TYPE scrate_page_bytes_total counter",
+            "scrate_page_bytes_total {}".format(run["page_bytes"]),
+            "# HELP scrate_places_total Places scraped",
+            "# TYPE scrate_places_total counter",
+            "scrate_places_total {}".format(run["places_total"]),
+        ]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as fd:
+            fd.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+class NullMetrics(Metrics):
+    """Does nothing, used while metrics are turned off so the hooks cost
+    no more than a method call
+    """
+
+    enabled = False
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return NULL_STAGE
+
+    def command(self, name: str) -> None:
+        pass
+
+    def transfer(self, n_bytes: int) -> None:
+        pass
+
+    def delay(self, stage: str, seconds: float) -> None:
+        pass
+
+    def end_place(self, pid: Optional[str] = None) -> None:
+        pass
+
+    def merge(self, other: Metrics) -> None:
+        pass
+
+
+NULL_STAGE = nullcontext()
+
+# recorder the scrape functions report to, off unless enabled
+_metrics: Metrics = NullMetrics()
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+def enable_metrics() -> Metrics:
+    # start recording, returning the recorder to export from later
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+
+def disable_metrics() -> None:
+    global _metrics
+    _metrics = NullMetrics()
+
+
+def instrument_driver(driver) -> None:
+    # count every webdriver command the driver sends, all of them (element
+    # lookups, clicks, scripts...) go through driver.execute
+    if getattr(driver, "_scrate_instrumented", False):
+        return
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        _metrics.command(driver_command)
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    driver._scrate_instrumented = True
@@ -0,0 +1,316 @@
+import re
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from scrate import get_module_logger
+from scrate.popular_times import empty_popular_times, popular_times_array
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# compact, typed versions of the place dicts scrate builds, each with
+# to_dict / from_dict so code expecting the dicts keeps working
+# every class uses __slots__ so no per object __dict__ is allocated
+
+# rating distribution rows e.g. '5 stars, 120 reviews'
+RATING_ROW_RE = re.compile(r"(\d) stars?, ([\d,]+) reviews?")
+
+# opening hours entries e.g. 'Saturday, 9AM to 11PM' or 'Monday, Closed'
+WEEKDAYS = [
+    "Sunday",
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+]
+HOURS_ENTRY_RE = re.compile(r"^\s*(\w+), (.+?)\s*$")
+TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])$")
+# minutes value of a day marked closed
+CLOSED = -1
+
+
+def _intern(value: str) -> str:
+    # categories, ages etc. repeat across places so share one copy of each
+    return sys.intern(value)
+
+
+class RatingDistribution:
+    """Count of reviews at each star rating, held as five ints. Labels in
+    a format we don't recognise are kept as their raw strings in raw.
+
+    Args:
+        counts (Sequence[int]): Reviews at 1 to 5 stars, empty if the place
+            shows no distribution
+        raw (Sequence[str]): Original row labels, only kept when one of
+            them couldn't be parsed
+    """
+
+    __slots__ = ("counts", "raw")
+
+    def __init__(
+        self, counts: Sequence[int] = (), raw: Sequence[str] = ()
+    ) -> None:
+        self.counts = array("I", counts)
+        self.raw = tuple(raw)
+
+    @classmethod
+    def from_labels(cls, labels: Sequence[str]) -> "RatingDistribution":
+        # from the row labels scraped from the pane
+        if len(labels) == 0:
+            return cls()
+        counts = [0] * 5
+        for label in labels:
+            found = RATING_ROW_RE.search(label)
+            if found is None or not 1 <= int(found[1]) <= 5:
+                logger.error("Cannot parse rating row: %s", label)
+                return cls(raw=labels)
+            counts[int(found[1]) - 1] = int(found[2].replace(",", ""))
+        return cls(counts)
+
+    def to_labels(self) -> List[str]:
+        # the row labels, 5 stars first as on the page
+        if self.raw:
+            return list(self.raw)
+        # as maps writes them e.g. '1 stars, 1,204 reviews'
+        return [
+            "{} stars, {:,} {}".format(
+                stars,
+                self.counts[stars - 1],
+                "review" if self.counts[stars - 1] == 1 else "reviews",
+            )
+            for stars in range(len(self.counts), 0, -1)
+        ]
+
+
+def _minutes(text: str) -> Optional[int]:
+    # minutes past midnight from e.g. '9AM' or '10:30PM'
+    found = TIME_RE.match(text.strip())
+    if found is None:
+        return None
+    hour = int(found[1]) % 12
+    if found[3].upper() == "PM":
+        hour += 12
+    return hour * 60 + int(found[2] or 0)
+
+
+def _time_label(minutes: int) -> str:
+    # inverse of _minutes, closes past midnight wrap round
+    hour, minute = divmod(minutes % (24 * 60), 60)
+    label = str((hour - 1) % 12 + 1)
+    if minute:
+        label += ":{:02d}".format(minute)
+    return label + ("AM" if hour < 12 else "PM")
+
+
+class OpeningHours:
+    """Opening hours as one (open, close) interval in minutes past midnight
+    per listed day, with CLOSED for both on closed days. A close earlier
+    than the open is pushed past midnight. Entries in a format we don't
+    recognise are kept as their raw strings in raw, others come back
+    stripped of the spaces they were scraped with.
+
+    Args:
+        days (Sequence[int]): Day of each entry, 0 for Sunday
+        opens (Sequence[int]): Opening minute of each entry
+        closes (Sequence[int]): Closing minute of each entry
+        raw (Sequence[str]): Original entries, only kept when one of them
+            couldn't be parsed
+    """
+
+    __slots__ = ("days", "opens", "closes", "raw")
+
+    def __init__(
+        self,
+        days: Sequence[int] = (),
+        opens: Sequence[int] = (),
+        closes: Sequence[int] = (),
+        raw: Sequence[str] = (),
+    ) -> None:
+        self.days = array("b", days)
+        self.opens = array("h", opens)
+        self.closes = array("h", closes)
+        self.raw = tuple(raw)
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[str]) -> "OpeningHours":
+        # from the entries scraped from the pane e.g. 'Saturday, 9AM to 11PM'
+        days, opens, closes = [], [], []
+        for entry in entries:
+            found = HOURS_ENTRY_RE.match(entry)
+            if found is None or found[1] not in WEEKDAYS:
+                return cls(raw=entries)
+            span = found[2]
+            if span == "Closed":
+                start = end = CLOSED
+            else:
+                times = span.split(" to ")
+                if len(times) != 2:
+                    return cls(raw=entries)
+                start, end = _minutes(times[0]), _minutes(times[1])
+                if start is None or end is None:
+                    return cls(raw=entries)
+                if end <= start:
+                    end += 24 * 60
+            days.append(WEEKDAYS.index(found[1]))
+            opens.append(start)
+            closes.append(end)
+        return cls(days, opens, closes)
+
+    def to_entries(self) -> List[str]:
+        if self.raw:
+            return list(self.raw)
+        entries = []
+        for day, start, end in zip(self.days, self.opens, self.closes):
+            if start == CLOSED:
+                span = "Closed"
+            else:
+                span = "{} to {}".format(_time_label(start), _time_label(end))
+            entries.append("{}, {}".format(WEEKDAYS[day], span))
+        return entries
+
+
+class Review:
+    """A single review, as returned by parse_review
+
+    Args:
+        review_id (str): Google's id for the review
+        age (str): How long ago it was left e.g. '3 weeks ago'
+        reviewer_count (int): Reviews the reviewer has left
+        rating (int): Stars given, 0 if unknown
+    """
+
+    __slots__ = ("review_id", "age", "reviewer_count", "rating")
+
+    def __init__(
+        self, review_id: str, age: str, reviewer_count: int, rating: int
+    ) -> None:
+        self.review_id = review_id
+        self.age = _intern(age)
+        self.reviewer_count = reviewer_count
+        self.rating = rating
+
+    @classmethod
+    def from_dict(cls, review: dict) -> "Review":
+        return cls(
+            review.get("review_id", ""),
+            review.get("age", ""),
+            review.get("reviewer_count", 0),
+            review.get("rating", 0),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "review_id": self.review_id,
+            "age": self.age,
+            "reviewer_count": self.reviewer_count,
+            "rating": self.rating,
+        }
+
+
+class Place:
+    """Everything scraped for one place, in place of the place dict of
+    general info, popular times and reviews
+
+    Args:
+        name (str): Place name
+        category (str): e.g. 'Restaurant'
+        price (int): Price level, count of currency symbols
+        review_count (int): Total reviews
+        rating (float): Overall rating, None where the place has none
+        rating_dist (RatingDistribution): Reviews at each star rating
+        opening_hours (OpeningHours): Hours by day
+        popular_times (np.ndarray): (7, 24) uint8 busyness, see
+            scrate.popular_times
+        reviews (List[Review]): Reviews scraped
+        queries (List[str]): Queries that found the place, in a batch
+    """
+
+    __slots__ = (
+        "name",
+        "category",
+        "price",
+        "review_count",
+        "rating",
+        "rating_dist",
+        "opening_hours",
+        "popular_times",
+        "reviews",
+        "queries",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        category: str = "",
+        price: int = 0,
+        review_count: int = 0,
+        rating: Optional[float] = None,
+        rating_dist: Optional[RatingDistribution] = None,
+        opening_hours: Optional[OpeningHours] = None,
+        popular_times: Optional[np.ndarray] = None,
+        reviews: Optional[List[Review]] = None,
+        queries: Optional[List[str]] = None,
+    ) -> None:
+        self.name = name
+        self.category = _intern(category)
+        self.price = price
+        self.review_count = review_count
+        self.rating = rating
+        self.rating_dist = rating_dist or RatingDistribution()
+        self.opening_hours = opening_hours or OpeningHours()
+        self.popular_times = (
+            empty_popular_times() if popular_times is None else popular_times
+        )
+        self.reviews = reviews or []
+        self.queries = queries or []
+
+    @classmethod
+    def from_dict(cls, place: dict) -> "Place":
+        # from the dict iter_location yields
+        general: dict = place.get("general", {})
+        return cls(
+            general.get("name", ""),
+            general.get("category", ""),
+            general.get("price", 0),
+            general.get("review_count", 0),
+            general.get("rating"),
+            RatingDistribution.from_labels(general.get("rating_dist", [])),
+            OpeningHours.from_entries(general.get("opening_hours", [])),
+            popular_times_array(place.get("popular_times", [])),
+            [Review.from_dict(r) for r in place.get("reviews", [])],
+            list(place.get("queries", [])),
+        )
+
+    def general(self) -> dict:
+        general_info = {
+            "name": self.name,
+            "category": self.category,
+            "price": self.price,
+            "review_count": self.review_count,
+        }
+        # rating is only present for places that have one, as scraped
+        if self.rating is not None:
+            general_info["rating"] = self.rating
+        general_info["rating_dist"] = self.rating_dist.to_labels()
+        general_info["opening_hours"] = self.opening_hours.to_entries()
+        return general_info
+
+    def to_dict(self) -> dict:
+        place = {
+            "general": self.general(),
+            "popular_times": self.popular_times,
+            "reviews": [r.to_dict() for r in self.reviews],
+        }
+        if self.queries:
+            place["queries"] = list(self.queries)
+        return place
+
+
+def to_models(places: Dict[str, dict]) -> Dict[str, Place]:
+    # e.g. the results of search_location, for holding many places
+    return {pid: Place.from_dict(place) for pid, place in places.items()}
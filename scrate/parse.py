@@ -0,0 +1,83 @@
+import re
+from typing import Tuple
+
+from scrate import get_module_logger
+from scrate.extract import Document, as_tree, extract_all, extract_text
+from scrate.popular_times import get_popular_times
+from scrate.snapshot import PlaceSnapshot
+
+# the parsing core: everything here works on html and strings alone, so
+# offline analysis and re-parsing never import selenium or start a browser
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# map position in a maps url e.g. .../@37.17,-3.59,17z/...
+GEO_RE = re.compile(r"(?<=/@)(.*?),(.*?)(?=,)")
+
+
+def parse_geo(url: str) -> Tuple[float, float]:
+    # use regex to strip lat and long, make floats and return
+    url_code = GEO_RE.search(url)
+    if url_code is None:
+        logger.error("Cannot strip lat and long from url: %s", url)
+        return (0.0, 0.0)
+    return (float(url_code[1]), float(url_code[2]))
+
+
+def get_rating_dist(soup: Document) -> list:
+
+    # rating distribution rows are the starred table rows in the pane
+    return extract_all(as_tree(soup), "rating_dist")
+
+
+def parse_general_info(snapshot: PlaceSnapshot) -> dict:
+
+    # storing dict
+    general_info = {}
+    tree = snapshot.tree
+
+    # strip place name from tab title
+    general_info["name"] = snapshot.name
+    # get place category
+    general_info["category"] = extract_text(tree, "category")
+    # get price as count
+    general_info["price"] = len(extract_text(tree, "price"))
+    # get review count
+    rc_raw: str = extract_text(tree, "review_count").strip()
+    if rc_raw == "":
+        rc = 0
+    else:
+        rc = int(
+            rc_raw.replace(" reviews", "")
+            .replace(" review", "")
+            .replace(",", "")
+        )
+    general_info["review_count"] = rc
+    # get overall rating
+    rating_raw = extract_text(tree, "rating")
+    if rating_raw == "":
+        rating = 0.0
+    else:
+        rating = float(rating_raw.replace("stars", "").replace(" ", ""))
+        general_info["rating"] = rating
+    # get rating distribution
+    general_info["rating_dist"] = get_rating_dist(tree)
+    # get opening hours
+    op_hours_raw = extract_text(tree, "opening_hours")
+    if op_hours_raw == "":
+        general_info["opening_hours"] = []
+    else:
+        op_hours = op_hours_raw.split(".")[0].split(";")
+        general_info["opening_hours"] = op_hours
+    # return our data
+    return general_info
+
+
+def parse_place(snapshot: PlaceSnapshot) -> dict:
+
+    # everything we get from the place pane itself, reviews aside
+    return {
+        "general": parse_general_info(snapshot),
+        "popular_times": get_popular_times(snapshot.tree),
+    }
@@ -0,0 +1,296 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver import Chrome
+from selenium.webdriver.support.ui import WebDriverWait
+
+from scrate import get_module_logger
+from scrate.cache import PageCache
+from scrate.geo import within_km
+from scrate.index import PlaceIndex, place_key
+from scrate.metrics import get_metrics
+from scrate.parse import parse_general_info
+from scrate.popular_times import get_popular_times
+from scrate.scrape import (
+    load_results,
+    next_results_page,
+    result_links,
+    resume_results,
+    scrape_reviews,
+)
+from scrate.snapshot import PANE_JS, PlaceSnapshot
+from scrate.store import CheckpointStore
+from scrate.tabs import EXISTS_JS, PLACE_READY_XP
+from scrate.waits import DEFAULT_WAIT, WaitPolicy
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# scrapes places one after another as iter_location does, but each place
+# is opened from its link in one of two windows of its own while the
+# results stay open in the first: the next place loads in the other window
+# while this one is scraped, and its html is parsed on a thread while the
+# browser moves on, so a place costs about the longer of its load and its
+# parse rather than the sum, and there's no going back to the results
+
+# starts loading a place without waiting for it, marking the document
+# being left so the ready check doesn't match it, see tabs.EXISTS_JS
+NAVIGATE_JS = """
+window.scrateStale = true;
+window.location.href = arguments[0];
+"""
+
+
+def open_window(driver: Chrome, blocked_urls: Sequence[str] = ()) -> str:
+    # a new tab to load places in, returning its handle
+    driver.switch_to.new_window("tab")
+    # blocking set up by create_driver only covers the first window
+    if blocked_urls:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd(
+            "Network.setBlockedURLs", {"urls": list(blocked_urls)}
+        )
+    return driver.current_window_handle
+
+
+def place_loaded(driver: Chrome) -> bool:
+    return driver.execute_script(EXISTS_JS, PLACE_READY_XP)
+
+
+def parse_pane(
+    title: str, html: str
+) -> Tuple[PlaceSnapshot, dict, np.ndarray]:
+    # runs on the parse thread, lxml does most of its work without the gil
+    snapshot = PlaceSnapshot(title, html)
+    general_info = parse_general_info(snapshot)
+    return snapshot, general_info, get_popular_times(snapshot.tree)
+
+
+def iter_candidates(
+    driver: Chrome,
+    results_window: str,
+    orig_coords: Tuple[float, float],
+    max_distance: float,
+    skip: Callable[[str], bool],
+    shard: Tuple[int, int] = (0, 1),
+    start: Tuple[int, int] = (0, 0),
+    wait: Optional[WaitPolicy] = None,
+    max_far: int = 20,
+    listed: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, str, Tuple[int, int]]]:
+
+    # (pid, href, cursor just past it) for each result worth opening, in
+    # results order, scrolling for more results or going to the next page
+    # as they run out, all in the results window, ending with the results
+    # skip(pid) is checked as each result is reached
+    wait = wait or DEFAULT_WAIT
+    metrics = get_metrics()
+    page, page_results_processed = start
+    far_run = 0
+    shard_index, shard_count = shard
+    links: Optional[List[str]] = None
+
+    driver.switch_to.window(results_window)
+    if page > 0 or page_results_processed > 0:
+        resumed = resume_results(driver, start, wait)
+        if resumed is None:
+            logger.info("No results past where the last run got to")
+            return
+        page, page_results_processed = resumed
+
+    while far_run < max_far:
+        # the caller switches windows between results
+        driver.switch_to.window(results_window)
+        if links is None:
+            links = result_links(driver)
+            in_range = within_km(links, orig_coords, max_distance)
+        if page_results_processed < len(links):
+            i = page_results_processed
+            page_results_processed += 1
+            near = bool(in_range[i])
+            far_run = 0 if near else far_run + 1
+            if listed is not None:
+                listed.add(place_key(links[i]))
+            if (page * 20 + i) % shard_count != shard_index:
+                continue
+            pid = place_key(links[i])
+            if not near:
+                logger.info("Too far from query, skipping %s", pid)
+            elif skip(pid):
+                logger.info("Already scraped, skipping %s", pid)
+            else:
+                yield pid, links[i], (page, page_results_processed)
+            continue
+        # every loaded result used, get more as iter_location does
+        if page_results_processed >= 20:
+            logger.info("Loading new page of 20 results")
+            with metrics.stage("next_page"):
+                loaded = next_results_page(driver, wait)
+            if len(loaded) == 0:
+                return
+            page += 1
+            page_results_processed = 0
+        else:
+            with metrics.stage("load_results"):
+                loaded = load_results(driver, page_results_processed, wait)
+            if len(loaded) <= page_results_processed:
+                return
+        links = None
+
+
+def iter_location_pipelined(
+    driver: Chrome,
+    max_res: int,
+    max_revs: int,
+    orig_coords: Tuple[float, float],
+    max_distance: float,
+    shard: Tuple[int, int] = (0, 1),
+    store: Optional[CheckpointStore] = None,
+    query: str = "",
+    start: Tuple[int, int] = (0, 0),
+    seen: Optional[Set[str]] = None,
+    wait: Optional[WaitPolicy] = None,
+    cache: Optional[PageCache] = None,
+    index: Optional[PlaceIndex] = None,
+    max_far: int = 20,
+    blocked_urls: Sequence[str] = (),
+    timeout: float = 10,
+    listed: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, dict]]:
+
+    # as iter_location, yielding the same places in the same order, each
+    # once the next place is under way
+    # timeout is the seconds a place gets to load before it is skipped
+    # with reviews wanted a place's parse is waited on straight away for
+    # its review count, so only the load of the next place overlaps
+    seen = set() if seen is None else set(seen)
+    wait = wait or DEFAULT_WAIT
+    metrics = get_metrics()
+    # places opened but not yet yielded
+    scheduled: Set[str] = set()
+
+    def skip(pid: str) -> bool:
+        if pid in seen or pid in scheduled:
+            return True
+        if store is not None and store.has_place(query, pid):
+            return True
+        if index is not None and index.match(pid, query):
+            # scraped for another query, just count it for this one
+            seen.add(pid)
+            return True
+        return False
+
+    def finish(
+        pid: str, cursor: Tuple[int, int], parsed: Future, reviews: list
+    ) -> Tuple[str, dict]:
+        snapshot, general_info, popular_times = parsed.result()
+        if cache is not None:
+            with metrics.stage("cache"):
+                cache.put(pid, snapshot)
+        place = {
+            "general": general_info,
+            "popular_times": popular_times,
+            "reviews": reviews,
+        }
+        scheduled.discard(pid)
+        seen.add(pid)
+        if index is not None:
+            index.add(pid, query, place)
+        if store is not None:
+            with metrics.stage("checkpoint"):
+                store.save_place(query, pid, place, shard, cursor)
+        metrics.end_place(pid)
+        return pid, place
+
+    logger.info(
+        "Scraping for %s results and %s reviews, pipelined",
+        max_res,
+        max_revs,
+    )
+    results_window = driver.current_window_handle
+    windows = [open_window(driver, blocked_urls) for _ in range(2)]
+    executor = ThreadPoolExecutor(1, thread_name_prefix="scrate-parse")
+    candidates = iter_candidates(
+        driver,
+        results_window,
+        orig_coords,
+        max_distance,
+        skip,
+        shard=shard,
+        start=start,
+        wait=wait,
+        max_far=max_far,
+        listed=listed,
+    )
+    # the last place scraped, yielded once the one after is under way
+    parsing: Optional[Tuple[str, Tuple[int, int], Future, list]] = None
+    # results cursor past the last result opened
+    last = start
+    try:
+        current = next(candidates, None) if max_res > len(seen) else None
+        if current is not None:
+            driver.switch_to.window(windows[0])
+            driver.execute_script(NAVIGATE_JS, current[1])
+        slot = 0
+        while current is not None:
+            pid, href, cursor = current
+            last = cursor
+            scheduled.add(pid)
+            # start the next result loading in the other window first
+            upcoming = None
+            if len(seen) + len(scheduled) < max_res:
+                upcoming = next(candidates, None)
+            if upcoming is not None:
+                driver.switch_to.window(windows[1 - slot])
+                driver.execute_script(NAVIGATE_JS, upcoming[1])
+            driver.switch_to.window(windows[slot])
+            entry = None
+            try:
+                with metrics.stage("open_place"):
+                    WebDriverWait(driver, timeout).until(place_loaded)
+                with metrics.stage("snapshot"):
+                    title, html = driver.execute_script(PANE_JS)
+                    html = html or ""
+                    metrics.transfer(len(html))
+                parsed = executor.submit(parse_pane, title or "", html)
+                reviews: list = []
+                if max_revs > 0:
+                    max_rev_count = min(
+                        parsed.result()[1]["review_count"], max_revs
+                    )
+                    if max_rev_count > 0:
+                        with metrics.stage("reviews"):
+                            reviews = scrape_reviews(
+                                driver, max_rev_count, wait=wait, leave=False
+                            )
+                entry = (pid, cursor, parsed, reviews)
+            except TimeoutException:
+                # not loaded, or no stars as no reviews, skip as
+                # iter_location does
+                scheduled.discard(pid)
+                # the cap may have held back the next result while this one
+                # still counted, so with nothing queued fetch it now
+                if upcoming is None and len(seen) + len(scheduled) < max_res:
+                    upcoming = next(candidates, None)
+                    if upcoming is not None:
+                        driver.switch_to.window(windows[1 - slot])
+                        driver.execute_script(NAVIGATE_JS, upcoming[1])
+            if parsing is not None:
+                yield finish(*parsing)
+            parsing = entry
+            current = upcoming
+            slot = 1 - slot
+        if parsing is not None:
+            yield finish(*parsing)
+            parsing = None
+    finally:
+        executor.shutdown(wait=False)
+        for window in windows:
+            driver.switch_to.window(window)
+            driver.close()
+        driver.switch_to.window(results_window)
+
+    if store is not None:
+        store.save_cursor(query, shard, last, finished=True)
@@ -0,0 +1,189 @@
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Chrome
+
+from scrate import get_module_logger
+from scrate.driver import DriverConfig
+from scrate.metrics import get_metrics
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+MAPS_URL = "https://www.google.co.uk/maps"
+
+
+def _children(pid: int) -> List[int]:
+    # child pids from /proc, linux only
+    children = []
+    try:
+        for tid in os.listdir("/proc/{}/task".format(pid)):
+            with open("/proc/{}/task/{}/children".format(pid, tid)) as fd:
+                children += [int(c) for c in fd.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+def browser_rss(driver: Chrome) -> int:
+
+    # resident memory in bytes of chromedriver and every chrome process
+    # under it, 0 where /proc isn't available to read it from
+    try:
+        root = driver.service.process.pid
+    except AttributeError:
+        return 0
+    total = 0
+    pending = [root]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open("/proc/{}/status".format(pid)) as fd:
+                for line in fd:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+        pending += _children(pid)
+    return total
+
+
+def is_healthy(driver: Chrome) -> bool:
+    # the browser still answers commands
+    try:
+        driver.execute_script("return 1")
+        return True
+    except WebDriverException:
+        return False
+
+
+class SessionPool:
+    """Keeps started Chrome sessions, already on Google Maps with the terms
+    accepted, to hand out to searches and take back after. A browser is
+    replaced once it has scraped max_places places or grown past max_rss, and
+    every browser is quit on close() or at interpreter exit.
+
+    Args:
+        size (int): Most idle browsers to keep, extras are quit on release
+        driver_config (DriverConfig): How to start each browser
+        max_places (int): Places a browser scrapes before it is recycled,
+            None for no limit
+        max_rss (int): Bytes of browser memory before it is recycled, None
+            for no limit, only measured on linux
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        driver_config: Optional[DriverConfig] = None,
+        max_places: Optional[int] = 500,
+        max_rss: Optional[int] = None,
+    ) -> None:
+        self.size = size
+        self.driver_config = driver_config
+        self.max_places = max_places
+        self.max_rss = max_rss
+        self._idle: List[Chrome] = []
+        self._places: Dict[int, int] = {}
+        self._drivers: Dict[int, Chrome] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def _start(self) -> Chrome:
+        # imported here as scrate.search uses the pool
+        from scrate.search import initiate_driver, start_session
+
+        metrics = get_metrics()
+        with metrics.stage("start_driver"):
+            driver = initiate_driver(self.driver_config)
+        with self._lock:
+            self._drivers[id(driver)] = driver
+            self._places[id(driver)] = 0
+        with metrics.stage("start_session"):
+            start_session(driver)
+        return driver
+
+    def _discard(self, driver: Chrome) -> None:
+        with self._lock:
+            self._drivers.pop(id(driver), None)
+            self._places.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException:
+            logger.exception("Error quitting Chrome driver")
+
+    def _worn_out(self, driver: Chrome) -> bool:
+        if (
+            self.max_places is not None
+            and self._places.get(id(driver), 0) >= self.max_places
+        ):
+            logger.info(
+                "Recycling browser after %s places", self._places[id(driver)]
+            )
+            return True
+        if self.max_rss is not None:
+            rss = browser_rss(driver)
+            if rss > self.max_rss:
+                logger.info("Recycling browser using %s bytes", rss)
+                return True
+        return False
+
+    def acquire(self) -> Chrome:
+        # an idle browser that still responds, or a freshly started one
+        if self._closed:
+            raise RuntimeError("Session pool is closed")
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._start()
+            if not is_healthy(driver):
+                logger.error("Discarding unresponsive browser from pool")
+                self._discard(driver)
+                continue
+            # back to a clean maps page, terms already accepted
+            with get_metrics().stage("start_session"):
+                driver.get(MAPS_URL)
+            return driver
+
+    def release(self, driver: Chrome, places: int = 0) -> None:
+        # return a browser after use, noting how many places it scraped
+        with self._lock:
+            if id(driver) in self._places:
+                self._places[id(driver)] += places
+            keep = not self._closed and len(self._idle) < self.size
+        if keep and is_healthy(driver) and not self._worn_out(driver):
+            with self._lock:
+                self._idle.append(driver)
+            return
+        self._discard(driver)
+
+    @contextmanager
+    def session(self) -> Iterator[Chrome]:
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        # quit every browser the pool started, idle or still checked out
+        with self._lock:
+            self._closed = True
+            drivers = list(self._drivers.values())
+            self._idle = []
+        for driver in drivers:
+            self._discard(driver)
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "SessionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
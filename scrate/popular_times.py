@@ -1,85 +1,204 @@
-from bs4 import BeautifulSoup
-from bs4.element import Tag
 import datetime as dt
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
-from selenium.webdriver import Chrome
-from selenium.webdriver.common.by import By
+import numpy as np
 
+from scrate.extract import Document, as_tree, extract_all
+from scrate.snapshot import PlaceSnapshot, take_snapshot
 
-def parse_popular_times(div: Tag, day_dict: dict) -> list:
+if TYPE_CHECKING:
+    from selenium.webdriver import Chrome
 
+# define day dictionary, keyed by the jsinstance of each day's div
+DAY_DICT = {
+    "0": "Sun",
+    "1": "Mon",
+    "2": "Tue",
+    "3": "Wed",
+    "4": "Thu",
+    "5": "Fri",
+    "*6": "Sat",
+}
+# row of each day in a busyness array, Sun first as above
+DAY_INDEX = {key: i for i, key in enumerate(DAY_DICT)}
+DAYS = list(DAY_DICT.values())
+
+# bar labels by hour of day e.g. '6 PM', looked up rather than strptime'd
+HOUR_LABELS = [
+    "{} {}".format((h - 1) % 12 + 1, "AM" if h < 12 else "PM")
+    for h in range(24)
+]
+HOURS = {label: h for h, label in enumerate(HOUR_LABELS)}
+TIMES = [dt.time(h) for h in range(24)]
+
+# busyness of an hour with no bar, real values run 0-100
+MISSING = 255
+
+
+def empty_popular_times() -> np.ndarray:
+    # 7 days (Sun-Sat) by 24 hours of busyness, all missing
+    return np.full((7, 24), MISSING, dtype=np.uint8)
+
+
+def parse_bar(label: str) -> Optional[Tuple[int, int]]:
+    # (hour, busyness) from a bar label e.g. '45% busy at 6 PM.'
+    b_div = label.split("% busy at ")
+    if len(b_div) != 2:
+        return None
+    hour = HOURS.get(b_div[1][:-1])
+    if hour is None:
+        return None
+    try:
+        return hour, int(b_div[0])
+    except ValueError:
+        return None
+
+
+def parse_popular_times(div: Document, day_dict: dict = DAY_DICT) -> list:
+
+    # one day's bars as dicts, see popular_times_records for the same view
+    # of a busyness array
     pop_data: list = []
+    div = as_tree(div)
     # get day as word from index
     day: str = day_dict[div.get("jsinstance")]
-    # parse through busyness data
-    for d in div.findAll("div"):
-        # if aria-label exists and busy is in it
-        if d.get("aria-label") and "busy" in d.get("aria-label"):
-            # then parse it
-            b_div = d.get("aria-label").split("% busy at ")
-            if len(b_div) == 2:
-                try:
-                    dte = dt.datetime.strptime(b_div[1][:-1], "%I %p")
-                    t = dte.time()
-                    pop_data.append(
-                        {
-                            "Day": day,
-                            "Time String": b_div[1][:-1],
-                            "Time": t,
-                            "Busyness": int(b_div[0]),
-                        }
-                    )
-                except ValueError:
-                    pass
+    # parse through busyness data e.g. '45% busy at 6 PM.'
+    for label in extract_all(div, "busyness"):
+        bar = parse_bar(label)
+        if bar is not None:
+            pop_data.append(
+                {
+                    "Day": day,
+                    "Time String": HOUR_LABELS[bar[0]],
+                    "Time": TIMES[bar[0]],
+                    "Busyness": bar[1],
+                }
+            )
     return pop_data
 
 
-def scrape_popular_times(driver: Chrome) -> list:
-
-    # check if popular times data exists on the page
-    popular_times_elements: list = driver.find_elements(
-        By.XPATH, "//div[contains(@aria-label, 'Popular times at')]"
-    )
-
-    data = []
-    # if so then let's get going
-    if len(popular_times_elements) > 0:
-
-        # use beautiful soup to parse
-        page_content: str = driver.page_source
-        soup: BeautifulSoup = BeautifulSoup(page_content, "lxml")
-
-        # define day dictionary
-        day_dict = {
-            "0": "Sun",
-            "1": "Mon",
-            "2": "Tue",
-            "3": "Wed",
-            "4": "Thu",
-            "5": "Fri",
-            "*6": "Sat",
-        }
-        d_ind = day_dict.keys()
-
-        # obtain the part of the html we want
-        for d in soup.findAll("div"):
-            # only get the left hand pane
-            if d.get("id") == "pane":
-                # iterate through divs in the pane
-                for pd in d.findAll("div"):
-                    # if pane_div has aria-label and it is what we want
-                    pt_txt = "Popular times at"
-                    if pd.get("aria-label") and pt_txt in pd.get("aria-label"):
-                        # then for each div in here
-                        for pop_div in pd.findAll("div"):
-                            # if jsinstance is one of our day indices
-                            if (
-                                pop_div.get("jsinstance")
-                                and pop_div.get("jsinstance") in d_ind
-                            ):
-                                # then let's parse it
-                                day_data: list = parse_popular_times(
-                                    pop_div, day_dict
-                                )
-                                data.append(day_data)
+def get_popular_times(
+    tree: Document, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+
+    # busyness by day and hour as a (7, 24) uint8 array, MISSING where
+    # there's no bar, written into out if given e.g. a row of a
+    # PopularTimesStack so nothing is copied
+    data = empty_popular_times() if out is None else out
+    if out is not None:
+        data.fill(MISSING)
+    # for each popular times chart in the pane (normally none or one)
+    for chart in extract_all(as_tree(tree), "popular_times"):
+        # then for each day div in here
+        for pop_div in extract_all(chart, "popular_times_days"):
+            # if jsinstance is one of our day indices then parse it
+            day = DAY_INDEX.get(pop_div.get("jsinstance"))
+            if day is None:
+                continue
+            for label in extract_all(pop_div, "busyness"):
+                bar = parse_bar(label)
+                if bar is not None:
+                    data[day, bar[0]] = bar[1]
     return data
+
+
+def popular_times_records(data: Union[np.ndarray, list]) -> list:
+
+    # the list of days of bar dicts scrate used to return, a view for
+    # code wanting the old form: one list per day, empty for a day with no
+    # bars e.g. closed, and no days at all for a place with no chart
+    if isinstance(data, list):
+        # already in this form, e.g. from an old checkpoint
+        return data
+    if (data == MISSING).all():
+        return []
+    records = []
+    for day, row in enumerate(data):
+        hours = np.flatnonzero(row != MISSING)
+        records.append(
+            [
+                {
+                    "Day": DAYS[day],
+                    "Time String": HOUR_LABELS[h],
+                    "Time": TIMES[h],
+                    "Busyness": int(row[h]),
+                }
+                for h in hours
+            ]
+        )
+    return records
+
+
+def popular_times_array(data: Union[np.ndarray, list]) -> np.ndarray:
+
+    # the (7, 24) array for either form, old list of dicts or array
+    if isinstance(data, np.ndarray):
+        return data
+    array = empty_popular_times()
+    for day in data:
+        for bar in day:
+            array[DAYS.index(bar["Day"]), bar["Time"].hour] = bar["Busyness"]
+    return array
+
+
+class PopularTimesStack:
+    """Busyness arrays of many places held in one preallocated
+    (n_places, 7, 24) uint8 block, so parsing writes straight into it and
+    the stacked array for analysis is a view rather than a copy. That only
+    holds within capacity: once the block fills, the next place copies it
+    into one twice the size, and rows or arrays taken before then still
+    point at the old block, so writes through them are lost. Take rows by
+    index from array after adding, or size capacity for every place.
+
+    Args:
+        capacity (int): Places to allocate room for up front, doubled
+            whenever it fills
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.data = np.full((capacity, 7, 24), MISSING, dtype=np.uint8)
+        self.pids: List[str] = []
+
+    def slot(self, pid: str) -> np.ndarray:
+        # the (7, 24) row for a new place, growing the block if full
+        # the row is a view of the block, valid until the next growth
+        if len(self.pids) == len(self.data):
+            grown = np.full(
+                (max(1, 2 * len(self.data)), 7, 24), MISSING, dtype=np.uint8
+            )
+            grown[: len(self.data)] = self.data
+            self.data = grown
+        self.pids.append(pid)
+        return self.data[len(self.pids) - 1]
+
+    def add(
+        self, pid: str, popular_times: Union[Document, np.ndarray]
+    ) -> np.ndarray:
+        # a place's busyness, from an array or parsed from its pane
+        # written into the block before returning, so it is kept whatever
+        # later growth does to the returned row
+        row = self.slot(pid)
+        if isinstance(popular_times, np.ndarray):
+            row[...] = popular_times
+        else:
+            get_popular_times(popular_times, out=row)
+        return row
+
+    @property
+    def array(self) -> np.ndarray:
+        # (n_places, 7, 24) view in the order places were added, of the
+        # current block, so take it again after adding more places
+        return self.data[: len(self.pids)]
+
+    def __len__(self) -> int:
+        return len(self.pids)
+
+
+def scrape_popular_times(
+    driver: "Chrome", snapshot: Optional[PlaceSnapshot] = None
+) -> np.ndarray:
+
+    # take a snapshot of the place pane unless we've been given one
+    if snapshot is None:
+        snapshot = take_snapshot(driver)
+    return get_popular_times(snapshot.tree)
@@ -0,0 +1,72 @@
+from typing import Container, Dict, Iterator, Tuple, Union
+
+from scrate import get_module_logger
+from scrate.sinks import read_jsonl
+from scrate.store import CheckpointStore
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# re-running a search against its earlier results: a place whose result
+# card shows the same review count and rating as before is taken as is
+# without being opened, a changed place is re-scraped reading its reviews
+# newest first only until one we already have, see iter_location
+
+
+def load_previous(
+    previous: Union[Dict[str, dict], str], query: str
+) -> Dict[str, dict]:
+
+    # the earlier results as a dict of places by pid, from a dict, a .jsonl
+    # file written by JsonlSink or the checkpoint file of an earlier run
+    if isinstance(previous, dict):
+        return previous
+    if previous.endswith(".jsonl"):
+        places = dict(read_jsonl(previous))
+    else:
+        store = CheckpointStore(previous)
+        try:
+            places = store.load_places(query)
+        finally:
+            store.close()
+    logger.info("Refreshing %s places from %s", len(places), previous)
+    return places
+
+
+def same_summary(card: dict, general: dict) -> bool:
+    # whether a result card shows the place as it was, going by what the
+    # card has: the review count and rating
+    return (
+        card.get("review_count") == general.get("review_count")
+        and card.get("rating") == general.get("rating")
+    )
+
+
+def merge_place(old: dict, new: dict) -> dict:
+
+    # the re-scraped place with its new reviews ahead of those we had,
+    # newest first as they were read
+    old_reviews = old.get("reviews", [])
+    known = {r["review_id"] for r in old_reviews}
+    merged = dict(new)
+    merged["reviews"] = [
+        r for r in new.get("reviews", []) if r["review_id"] not in known
+    ] + list(old_reviews)
+    if "queries" in old:
+        merged["queries"] = list(old["queries"])
+    return merged
+
+
+def unrefreshed(
+    previous: Dict[str, dict], refreshed: Container[str]
+) -> Iterator[Tuple[str, dict]]:
+
+    # the earlier places a refresh didn't reach again, e.g. further down
+    # the results than it went or no longer listed, as they were
+    kept = [
+        (pid, place)
+        for pid, place in previous.items()
+        if pid not in refreshed
+    ]
+    logger.info("Keeping %s places not reached again", len(kept))
+    return iter(kept)
@@ -0,0 +1,65 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+from scrate import get_module_logger
+from scrate.cache import PageCache, decode_snapshot
+from scrate.parse import parse_place
+from scrate.sinks import JsonlSink
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+
+def reparse_page(entry: Tuple[str, str]) -> Tuple[str, dict]:
+
+    # entry is (pid, path to cached page), read straight from disk so
+    # worker processes never touch the cache index
+    pid, path = entry
+    with open(path, "rb") as fd:
+        snapshot = decode_snapshot(fd.read())
+    return pid, parse_place(snapshot)
+
+
+def iter_reparse(
+    cache_dir: str,
+    workers: Optional[int] = None,
+    chunksize: int = 32,
+    ttl: Optional[float] = None,
+) -> Iterator[Tuple[str, dict]]:
+
+    # re-run the place parsers over every cached page without a browser,
+    # spread over workers processes (all cores by default)
+    # yields (pid, place) with general info and popular times, reviews are
+    # not part of the cached pane so are left for the caller to merge
+    # pages older than ttl seconds are expired rather than re-parsed
+    cache = PageCache(cache_dir, ttl=ttl)
+    entries = cache.paths()
+    cache.close()
+    logger.info("Re-parsing %s cached pages from %s", len(entries), cache_dir)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for entry in entries:
+            yield reparse_page(entry)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(reparse_page, entries, chunksize=chunksize)
+
+
+def reparse(
+    cache_dir: str,
+    workers: Optional[int] = None,
+    ttl: Optional[float] = None,
+) -> Dict[str, dict]:
+
+    return dict(iter_reparse(cache_dir, workers, ttl=ttl))
+
+
+if __name__ == "__main__":
+
+    # python -m scrate.reparse <cache dir> <output jsonl>
+    cache_dir, out_path = sys.argv[1], sys.argv[2]
+    with JsonlSink(out_path) as sink:
+        for pid, place in iter_reparse(cache_dir):
+            sink.write(pid, place)
@@ -0,0 +1,167 @@
+import json
+from typing import Callable, Iterator, List, Optional
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver import Chrome
+from selenium.webdriver.common.by import By
+
+from scrate import get_module_logger
+from scrate.metrics import get_metrics
+from scrate.utils import click_element, scroll_down_section
+from scrate.waits import DEFAULT_WAIT, WaitPolicy, stale, visible
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# xpath to the individual review containers in the reviews section
+REVIEWS_XP = "//div[contains(@jsan, 'data-review-id')]"
+
+# scrollable container holding the reviews
+REVIEWS_BOX_CSS = "div[class*='section-scrollbox']"
+
+# button opening the reviews sort menu, and the newest first option in it
+SORT_REVIEWS_XP = "//button[contains(@aria-label, 'Sort reviews')]"
+NEWEST_XP = "//*[@role='menuitemradio'][contains(., 'Newest')]"
+
+# pull the raw data for every loaded review in a single browser round trip
+# star rating is looked up within each review so each gets its own rating
+REVIEWS_JS = """
+var res = document.evaluate(
+    arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+);
+var n = Math.min(res.snapshotLength, arguments[1]);
+var out = [];
+for (var i = 0; i < n; i++) {
+    var el = res.snapshotItem(i);
+    var stars = el.querySelector("span[aria-label*='stars']");
+    out.push({
+        id: el.getAttribute('data-review-id') || '',
+        text: el.innerText || '',
+        stars: stars ? stars.getAttribute('aria-label') : ''
+    });
+}
+return JSON.stringify(out);
+"""
+
+# as above but only for reviews not returned by a previous call
+# each returned review element is tagged in the page so later calls skip it
+# without re-sending the ids we've already seen
+NEW_REVIEWS_JS = """
+var res = document.evaluate(
+    arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+);
+var out = [];
+for (var i = 0; i < res.snapshotLength; i++) {
+    var el = res.snapshotItem(i);
+    if (el.hasAttribute('data-scrate-seen')) {
+        continue;
+    }
+    el.setAttribute('data-scrate-seen', '1');
+    var stars = el.querySelector("span[aria-label*='stars']");
+    out.push({
+        id: el.getAttribute('data-review-id') || '',
+        text: el.innerText || '',
+        stars: stars ? stars.getAttribute('aria-label') : ''
+    });
+}
+return JSON.stringify(out);
+"""
+
+
+def parse_review(raw: dict) -> dict:
+
+    review = {}
+    review_data = raw["text"].split("\n")
+    review["review_id"] = raw["id"]
+    review["age"] = review_data[2] if len(review_data) > 2 else ""
+    # reviewer line looks like 'Local Guide · 12 reviews'
+    reviewer_review_count = (
+        review_data[1]
+        .replace("Local Guide ·", "")
+        .replace("reviews", "")
+        .replace("review", "")
+        .replace(" ", "")
+        if len(review_data) > 1
+        else ""
+    )
+    try:
+        review["reviewer_count"] = int(reviewer_review_count)
+    except ValueError:
+        logger.error("Cannot parse reviewer count from: %s", review_data[:2])
+        review["reviewer_count"] = 0
+    # star label looks like ' 4 stars '
+    rt = raw["stars"].replace("stars", "").replace(" ", "")
+    review["rating"] = int(rt) if rt.isdigit() else 0
+    return review
+
+
+def sort_newest(driver: Chrome, wait: Optional[WaitPolicy] = None) -> bool:
+
+    # put the open reviews section in newest first order
+    # returns False if it can't, leaving them in the default order
+    wait = wait or DEFAULT_WAIT
+    try:
+        sort_button = driver.find_element(By.XPATH, SORT_REVIEWS_XP)
+        click_element(driver, sort_button, wait)
+        loaded = driver.find_elements(By.XPATH, REVIEWS_XP)
+        newest = driver.find_element(By.XPATH, NEWEST_XP)
+        click_element(driver, newest, wait)
+    except NoSuchElementException:
+        logger.error("Unable to sort reviews by newest")
+        return False
+    # the reviews are reloaded in the new order
+    if len(loaded) > 0:
+        wait.wait_for(driver, "sort_reviews", stale(loaded[0]), 2)
+    else:
+        wait.wait_for(driver, "sort_reviews", visible(REVIEWS_XP), 2)
+    return True
+
+
+def extract_reviews(driver: Chrome, max_reviews: int) -> List[dict]:
+
+    # one execute_script for all loaded reviews instead of per review lookups
+    raw_json: str = driver.execute_script(REVIEWS_JS, REVIEWS_XP, max_reviews)
+    get_metrics().transfer(len(raw_json))
+    raw_reviews: list = json.loads(raw_json)
+    return [parse_review(r) for r in raw_reviews]
+
+
+def stream_reviews(
+    driver: Chrome,
+    max_stalls: int = 3,
+    stop: Optional[Callable[[dict], bool]] = None,
+    wait: Optional[WaitPolicy] = None,
+) -> Iterator[dict]:
+
+    # yield reviews as they load, scrolling the reviews box for more
+    # only reviews new since the last scroll are fetched and parsed
+    # ends when max_stalls scrolls in a row produce no new review ids,
+    # when stop(review) is true, or when the caller stops iterating
+    wait = wait or DEFAULT_WAIT
+    seen: set = set()
+    stalls = 0
+    while stalls < max_stalls:
+        raw_json: str = driver.execute_script(NEW_REVIEWS_JS, REVIEWS_XP)
+        get_metrics().transfer(len(raw_json))
+        raw_reviews: list = json.loads(raw_json)
+        new_count = 0
+        for raw in raw_reviews:
+            # maps can re-render a review so de-dupe on id as well
+            if raw["id"] and raw["id"] in seen:
+                continue
+            seen.add(raw["id"])
+            new_count += 1
+            review = parse_review(raw)
+            if stop is not None and stop(review):
+                return
+            yield review
+        if new_count == 0:
+            stalls += 1
+            logger.info(
+                "No new reviews after scroll %s of %s", stalls, max_stalls
+            )
+        else:
+            stalls = 0
+        # scroll down to load more then wait a bit
+        scroll_down_section(driver, REVIEWS_BOX_CSS, wait)
+        wait.pause("scroll", 1)
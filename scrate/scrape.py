@@ -1,6 +1,6 @@
 # import usuals
-from bs4 import BeautifulSoup
-from typing import Dict, Tuple
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 # import selenium functions for chrome driver manipulation
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
@@ -11,294 +11,514 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 # helper functions to mask automated scrape
 from scrate import get_module_logger
-from scrate.popular_times import scrape_popular_times
+from scrate.cards import harvest_cards
+from scrate.geo import within_km
+from scrate.index import PlaceIndex, place_key
+from scrate.metrics import get_metrics
+from scrate.cache import PageCache
+from scrate.parse import (  # noqa: F401, kept importable from scrape
+    get_rating_dist,
+    parse_general_info,
+    parse_place,
+)
+from scrate.popular_times import empty_popular_times, scrape_popular_times
+from scrate.refresh import merge_place, same_summary
+from scrate.reviews import REVIEWS_XP, sort_newest, stream_reviews
+from scrate.snapshot import PlaceSnapshot, take_snapshot
+from scrate.store import CheckpointStore
 from scrate.utils import (
     back_to_results,
     click_element,
-    get_element_al_by_xpath,
-    get_element_text_by_css,
-    get_geo,
-    random_delay,
     scroll_down_results,
-    scroll_down_section,
 )
+from scrate.waits import DEFAULT_WAIT, WaitPolicy, stale, visible
 
 # set logger for this module
 logger = get_module_logger(__name__)
 
 
-def get_rating_dist(soup: BeautifulSoup) -> list:
-
-    rating_dist = []
-    # get all divs
-    for doc in soup.findAll("div"):
-        # if div id is the pane
-        if doc.get("id") == "pane":
-            # then find all table elements in the pane
-            # as the review distribution data is in a table
-            for tr in doc.findAll("tr"):
-                # print('tr is {}'.format(tr))
-                # if table element has an aria label
-                # and stars is in it
-                if tr.get("aria-label") and "stars" in tr.get("aria-label"):
-                    # then append this to dist
-                    # print('tr label is {}'.format(tr.get('aria-label')))
-                    rating_dist.append(tr.get("aria-label"))
-    # return the dist
-    return rating_dist
-
-
-def scrape_general_info(driver: Chrome) -> dict:
+def scrape_general_info(
+    driver: Chrome, snapshot: Optional[PlaceSnapshot] = None
+) -> dict:
 
-    # storing dict
-    general_info = {}
+    # take a snapshot of the place pane unless we've been given one
+    if snapshot is None:
+        snapshot = take_snapshot(driver)
+    return parse_general_info(snapshot)
 
-    # create bs4 object to help with parsing
-    page_content: str = driver.page_source
-    soup: BeautifulSoup = BeautifulSoup(page_content, "lxml")
 
-    # strip place name from tab title
-    try:
-        general_info["name"] = soup.findAll("title")[0].text.replace(
-            " - Google Maps", ""
-        )
-    except IndexError:
-        general_info["name"] = ""
-    # get place category
-    cat_css = 'button[jsaction="pane.rating.category"]'
-    general_info["category"] = get_element_text_by_css(driver, cat_css)
-    # get price as count
-    price_css = 'span[aria-label*="Price"]'
-    general_info["price"] = len(get_element_text_by_css(driver, price_css))
-    # get review count
-    rc_css = 'button[jsaction="pane.rating.moreReviews"]'
-    rc_raw: str = get_element_text_by_css(driver, rc_css)
-    if rc_raw == "":
-        rc = 0
-    else:
-        rc = int(
-            rc_raw.replace(" reviews", "")
-            .replace(" review", "")
-            .replace(",", "")
-        )
-    general_info["review_count"] = rc
-    # get overall rating
-    rating_xp = "//ol[contains(@aria-label,'stars')]"
-    rating_raw = get_element_al_by_xpath(driver, rating_xp)
-    if rating_raw == "":
-        rating = 0.0
-    else:
-        rating = float(rating_raw.replace("stars", "").replace(" ", ""))
-        general_info["rating"] = rating
-    # get rating distribution
-    general_info["rating_dist"] = get_rating_dist(soup)
-    # get opening hours
-    op_hours_xp = "//div[contains(@aria-label, 'Saturday')]"
-    op_hours_raw = get_element_al_by_xpath(driver, op_hours_xp)
-    if op_hours_raw == "":
-        general_info["opening_hours"] = []
-    else:
-        op_hours = op_hours_raw.split(".")[0].split(";")
-        general_info["opening_hours"] = op_hours
-    # return our data
-    return general_info
-
-
-def scrape_reviews(driver: Chrome, max_reviews: int) -> list:
+def scrape_reviews(
+    driver: Chrome,
+    max_reviews: int,
+    max_stalls: int = 3,
+    stop: Optional[Callable[[dict], bool]] = None,
+    wait: Optional[WaitPolicy] = None,
+    newest_first: bool = False,
+    leave: bool = True,
+) -> list:
 
+    # newest_first sorts the reviews newest first before reading them
+    # leave goes back out to the place afterwards, not needed when the
+    # window is about to load another place anyway
+    wait = wait or DEFAULT_WAIT
     try:
         # wait until page has loaded the more reviews button
         reviews_button = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located(
-                (By.XPATH, "//button[contains(@aria-label, 'More reviews')]")
+                (By.XPATH, MORE_REVIEWS_XP)
             )
         )
         # click it
-        click_element(driver, reviews_button)
+        click_element(driver, reviews_button, wait)
     except NoSuchElementException:
         logger.error("Unable to locate the 'More reviews' button")
 
     # now we have clicked it, scroll down until can id enough reviews
     # check we have some reviews loaded
     reviews_exist = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located(
-            (By.XPATH, "//div[contains(@jsan, 'data-review-id')]")
-        )
+        EC.presence_of_element_located((By.XPATH, REVIEWS_XP))
     )
     reviews = []
-    review_elements: list = []
+    if reviews_exist and newest_first and not sort_newest(driver, wait):
+        # still in the default order, so stopping at a review tells us
+        # nothing about the ones after it
+        stop = None
     if reviews_exist:
-        # fetch review elements
-        review_elements = driver.find_elements(
-            By.XPATH, "//div[contains(@jsan, 'data-review-id')]"
+        # stream reviews in as we scroll until we have enough
+        # or maps stops loading new ones
+        stream = stream_reviews(
+            driver, max_stalls=max_stalls, stop=stop, wait=wait
         )
-        # while we haven't got enough reviews
-        while len(review_elements) < max_reviews:
-            # scroll down to load more
-            scroll_down_section(driver, "div[class*='section-scrollbox']")
-            # wait a bit
-            random_delay(1)
-            # grab our new set of reviews
-            review_elements = driver.find_elements(
-                By.XPATH, "//div[contains(@jsan, 'data-review-id')]"
-            )
-        # now we have enough reviews let's grab the data we want from them
-        review_elements = review_elements[:max_reviews]
-        for r in review_elements:
-            review = {}
-            review_data = r.text.split("\n")
-            review["age"] = review_data[2]
-            reviewer_review_count = (
-                review_data[1]
-                .replace("Local Guide ·", "")
-                .replace("reviews", "")
-                .replace("review", "")
-                .replace(" ", "")
-            )
-            # if '1' in reviewer_review_count:
-            #     review['reviewer_count'] = 1
-            # else:
-            review["reviewer_count"] = int(reviewer_review_count)
-            rt_xp = "//span[contains(@aria-label, 'stars')]"
-            rt = get_element_al_by_xpath(driver, rt_xp)
-            rt = rt.replace("stars", "").replace(" ", "")
-            review["rating"] = int(rt)
-            reviews.append(review)
-
-    # now let's go back out of the reviews section
-    back_to_results(driver)
+        reviews = list(islice(stream, max_reviews))
+
+    # now let's go back out of the reviews section to the place itself
+    if leave:
+        back_to_results(driver, wait, ready=visible(MORE_REVIEWS_XP))
     return reviews
 
 
-def scrape_location(
+# xpath to the button opening the reviews section of a place
+MORE_REVIEWS_XP = "//button[contains(@aria-label, 'More reviews')]"
+
+# xpath to the place links in the paginated results list
+PLACES_XP = "//*[contains(@href,'https://www.google.co.uk/maps/place/')]"
+
+# xpath to the note maps shows below the last result of a search
+END_OF_LIST_XP = "//span[contains(text(), 'reached the end of the list')]"
+
+# xpath to the button for the next page of results
+NEXT_PAGE_XP = "//button[@aria-label=' Next page ']"
+
+# every result link's href in one round trip rather than one per result
+RESULT_LINKS_JS = """
+const found = document.evaluate(
+    arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+);
+const hrefs = [];
+for (let i = 0; i < found.snapshotLength; i++) {
+    hrefs.push(found.snapshotItem(i).getAttribute("href"));
+}
+return hrefs;
+"""
+
+
+def result_links(driver: Chrome) -> List[str]:
+    return driver.execute_script(RESULT_LINKS_JS, PLACES_XP) or []
+
+
+def read_results(
+    driver: Chrome, list_only: bool = False
+) -> Tuple[List[str], List[dict]]:
+
+    # the result links, plus in list only mode the general info from each
+    # result card, both from a single script call
+    if not list_only:
+        return result_links(driver), []
+    with get_metrics().stage("cards"):
+        cards = harvest_cards(driver, PLACES_XP)
+    return [href for href, _ in cards], [general for _, general in cards]
+
+
+def next_results_page(
+    driver: Chrome, wait: Optional[WaitPolicy] = None
+) -> list:
+
+    # the results of the next page, none if this was the last page
+    wait = wait or DEFAULT_WAIT
+    # head on over to the next page of results
+    old_results = driver.find_elements(By.XPATH, PLACES_XP)
+    next_buttons = driver.find_elements(By.XPATH, NEXT_PAGE_XP)
+    if len(next_buttons) == 0:
+        logger.info("No next page of results")
+        return []
+    click_element(driver, next_buttons[0], wait)
+    # wait for the old results to be replaced
+    if len(old_results) > 0:
+        wait.wait_for(driver, "next_page", stale(old_results[0]), 2)
+    else:
+        wait.pause("next_page", 2)
+    # grab our first set of new results
+    return driver.find_elements(By.XPATH, PLACES_XP)
+
+
+def load_results(
+    driver: Chrome,
+    n: int,
+    wait: Optional[WaitPolicy] = None,
+    max_stalls: int = 3,
+) -> list:
+
+    # scroll down the results list until more than n results are loaded
+    # or the list has ended, so check how many come back: it ends at the
+    # end of list note, or after max_stalls scrolls in a row load nothing
+    wait = wait or DEFAULT_WAIT
+    gmaps_results = driver.find_elements(By.XPATH, PLACES_XP)
+    stalls = 0
+    while len(gmaps_results) <= n and stalls < max_stalls:
+        if len(driver.find_elements(By.XPATH, END_OF_LIST_XP)) > 0:
+            logger.info("End of the results at %s", len(gmaps_results))
+            break
+        logger.info("Scrolling to load new results")
+        logger.info("Have %s results but processed %s", len(gmaps_results), n)
+        # scroll down, wait, then grab new results
+        results_xp = "//div[contains(@aria-label, 'Results for')]"
+        scroll_down_results(driver, results_xp, wait)
+        wait.pause("scroll", 1)
+        loaded = driver.find_elements(By.XPATH, PLACES_XP)
+        stalls = 0 if len(loaded) > len(gmaps_results) else stalls + 1
+        gmaps_results = loaded
+    return gmaps_results
+
+
+def resume_results(
+    driver: Chrome, start: Tuple[int, int], wait: Optional[WaitPolicy] = None
+) -> Optional[Tuple[int, int]]:
+
+    # go to where an earlier run got to in the results, returning the
+    # (page, page_results_processed) cursor to carry on from, or None if
+    # the results end there
+    page, page_results_processed = start
+    # a cursor past the last result of a full page, as saved with the 20th
+    # place, is the start of the next page
+    if page_results_processed >= 20:
+        page += 1
+        page_results_processed = 0
+    logger.info(
+        "Resuming from page %s result %s", page, page_results_processed
+    )
+    for _ in range(page):
+        if len(next_results_page(driver, wait)) == 0:
+            return None
+    loaded = load_results(driver, page_results_processed, wait)
+    if len(loaded) <= page_results_processed:
+        return None
+    return page, page_results_processed
+
+
+def iter_location(
     driver: Chrome,
     max_res: int,
     max_revs: int,
     orig_coords: Tuple[float, float],
     max_distance: float,
-) -> dict:
+    shard: Tuple[int, int] = (0, 1),
+    store: Optional[CheckpointStore] = None,
+    query: str = "",
+    start: Tuple[int, int] = (0, 0),
+    seen: Optional[Set[str]] = None,
+    wait: Optional[WaitPolicy] = None,
+    cache: Optional[PageCache] = None,
+    index: Optional[PlaceIndex] = None,
+    max_far: int = 20,
+    list_only: bool = False,
+    previous: Optional[Dict[str, dict]] = None,
+    listed: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, dict]]:
 
-    # vars to keep track of our results
-    results: Dict[str, dict] = {}
-    page_results_processed = 0
-    close_enough = True
+    # yields (pid, place) one at a time as each place is scraped
+    # places further than max_distance km from orig_coords are skipped
+    # without being opened, going by the position in their result link
+    # the search ends after max_far out of range results in a row, i.e.
+    # a whole page's worth by default, as later pages are further still
+    # list_only takes each place's general info from its result card and
+    # never opens the place, leaving popular times missing and no reviews
+    # seen holds pids already found e.g. by an earlier run, these count
+    # towards max_res and are not yielded again
+    # previous is the places from an earlier run to refresh, see
+    # scrate.refresh, a place whose card shows no change is yielded as it
+    # was and a changed one is re-scraped, with only its new reviews read
+    # listed, if given, gets the pid of every result read, near or far and
+    # in any shard, e.g. to tell whether a search ran out of results
+    seen = set() if seen is None else set(seen)
+    # wait is the policy deciding how long to wait between steps
+    wait = wait or DEFAULT_WAIT
+    # index holds places scraped by other queries, which are counted as
+    # results of this query without being opened again
+    # stage timings etc. go to the active recorder, a no-op unless enabled
+    metrics = get_metrics()
+    # start is the (page, page_results_processed) cursor to resume from
+    page, page_results_processed = start
+    # consecutive results found to be too far away
+    far_run = 0
+    # result links, and cards in list only mode, re-read when they change
+    links: Optional[List[str]] = None
+    # shard is (index, count): only scrape results where idx % count == index
+    shard_index, shard_count = shard
+    # refreshing compares each place's card with what we had
+    with_cards = list_only or previous is not None
 
-    logger.info(
-        "Scraping for {} results and {} reviews".format(max_res, max_revs)
-    )
-    # while still need more data and close enough
-    while len(results.keys()) < max_res and close_enough:
+    logger.info("Scraping for %s results and %s reviews", max_res, max_revs)
+    # when resuming skip forward to where the last run got to
+    if page > 0 or page_results_processed > 0:
+        resumed = resume_results(driver, start, wait)
+        if resumed is None:
+            logger.info("No results past where the last run got to")
+            if store is not None:
+                store.save_cursor(query, shard, start, finished=True)
+            return
+        page, page_results_processed = resumed
 
-        # fetch place results
-        places_xp = (
-            "//*[contains(@href,'https://www.google.co.uk/maps/place/')]"
-        )
-        gmaps_results = driver.find_elements(By.XPATH, places_xp)
+    # while still need more data and still finding places close enough
+    while len(seen) < max_res and far_run < max_far:
+
+        # fetch the place result links and which are in range, all at once
+        if links is None:
+            links, cards = read_results(driver, with_cards)
+            in_range = within_km(links, orig_coords, max_distance)
         logger.info(
-            "{} current results, {} processed".format(
-                len(gmaps_results), page_results_processed
-            )
+            "%s current results, %s processed",
+            len(links),
+            page_results_processed,
         )
-        # grab the singular result we are interested in currently
-        r = gmaps_results[page_results_processed]
-        logger.info("Starting processing {}".format(r))
-        # open specific result to scrape
-        click_element(driver, r)
-        # wait until it has loaded properly
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//tr[contains(@aria-label,'stars')]")
-                )
+        # position of this result across all pages of the search
+        result_index = page * 20 + page_results_processed
+        in_shard = result_index % shard_count == shard_index
+        known = False
+        # the place as it was, when refreshing and we have it
+        old: Optional[dict] = None
+        near = bool(in_range[page_results_processed])
+        far_run = 0 if near else far_run + 1
+        if listed is not None:
+            listed.add(place_key(links[page_results_processed]))
+        if in_shard:
+            # key the place by the stable id in its link, so it is known
+            # before paying to open it
+            pid = place_key(links[page_results_processed])
+        if in_shard and near:
+            # already scraped, possibly by an earlier run, checked only for
+            # places in reach so a far one isn't counted for this query
+            known = pid in seen or (
+                store is not None and store.has_place(query, pid)
             )
-            # we have clicked on specific place, now to start scraping
-            # first check it is not too far away from initial search location
-            place_coords = get_geo(driver)
-            lat_diff = abs(place_coords[0] - orig_coords[0])
-            lng_diff = abs(place_coords[1] - orig_coords[1])
-
-            # check if we are too far away
-            if lat_diff > max_distance or lng_diff > max_distance:
-                # then we're too far
-                logger.info("Too far from original query, going back")
-                # exit loop as too far
-                close_enough = False
-                # update page res count so know to go to next page at 20
-                page_results_processed += 1
-                logger.info("Going back to paginated results")
-                logger.info("------------------------------------")
-                back_to_results(driver)
-                # update so we have the recent count of results
-                gmaps_results = driver.find_elements(By.XPATH, places_xp)
+            if not known and index is not None and index.match(pid, query):
+                # scraped for another query, just count it for this one
+                seen.add(pid)
+                known = True
+            if previous is not None:
+                old = previous.get(pid)
+        unchanged = old is not None and same_summary(
+            cards[page_results_processed], old["general"]
+        )
+        if not in_shard:
+            # result belongs to another worker's shard so leave it to them
+            page_results_processed += 1
+        elif not near:
+            logger.info("Too far from original query, skipping %s", pid)
+            page_results_processed += 1
+        elif known:
+            logger.info("Already scraped, skipping %s", pid)
+            page_results_processed += 1
+        elif list_only or unchanged:
+            if unchanged:
+                # nothing new since the earlier run, keep what we had
+                logger.info("Unchanged since last run, skipping %s", pid)
+                place = old
             else:
-                # within distance, start scraping
-                general_info = scrape_general_info(driver)
-                # scrape popular times data that forms the busyness bar chart
-                popular_times = scrape_popular_times(driver)
+                # everything we want is on the card, no need to open it
+                place = {
+                    "general": cards[page_results_processed],
+                    "popular_times": empty_popular_times(),
+                    "reviews": [],
+                }
+            seen.add(pid)
+            if index is not None:
+                index.add(pid, query, place)
+            page_results_processed += 1
+            if store is not None:
+                with metrics.stage("checkpoint"):
+                    store.save_place(
+                        query,
+                        pid,
+                        place,
+                        shard,
+                        (page, page_results_processed),
+                    )
+            metrics.end_place(pid)
+            yield pid, place
+        else:
+            # grab the singular result we are interested in currently
+            r = driver.find_elements(By.XPATH, PLACES_XP)[
+                page_results_processed
+            ]
+            logger.info("Starting processing %s", r)
+            # scraped stays None unless the place is scraped
+            scraped = None
+            try:
+                # open specific result to scrape
+                # and wait until it has loaded properly
+                with metrics.stage("open_place"):
+                    click_element(driver, r, wait)
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located(
+                            (By.XPATH, "//tr[contains(@aria-label,'stars')]")
+                        )
+                    )
+                # we have clicked on specific place, now to start scraping
+                scraped = pid
+                # snapshot the pane once for all parsers
+                with metrics.stage("snapshot"):
+                    snapshot = take_snapshot(driver)
+                # keep the raw pane so it can be re-parsed offline
+                if cache is not None:
+                    with metrics.stage("cache"):
+                        cache.put(pid, snapshot)
+                with metrics.stage("general_info"):
+                    general_info = scrape_general_info(driver, snapshot)
+                # scrape popular times data that forms the busyness chart
+                with metrics.stage("popular_times"):
+                    popular_times = scrape_popular_times(driver, snapshot)
                 # scrape the reviews data
-                # if we don't want any or there aren't any then don't bother
+                # if we don't want any or there aren't any then skip
                 max_rev_count = min(general_info["review_count"], max_revs)
                 if max_rev_count == 0:
                     reviews = []
+                elif old is not None:
+                    # newest first, only as far as the reviews we have
+                    known_ids = {r["review_id"] for r in old["reviews"]}
+                    with metrics.stage("reviews"):
+                        reviews = scrape_reviews(
+                            driver,
+                            max_rev_count,
+                            stop=lambda r: r["review_id"] in known_ids,
+                            wait=wait,
+                            newest_first=True,
+                        )
                 else:
-                    reviews = scrape_reviews(driver, max_rev_count)
+                    with metrics.stage("reviews"):
+                        reviews = scrape_reviews(
+                            driver, max_rev_count, wait=wait
+                        )
 
-                # stick data in dictionary and return to results
-                # use url as pid
-                pid = driver.current_url
-                results[pid] = {
+                # stick data in dictionary and hand it out
+                place = {
                     "general": general_info,
                     "popular_times": popular_times,
                     "reviews": reviews,
                 }
-                logger.info("Info scraped for r: {}".format(r))
-                logger.info("Going back to paginated results")
-                logger.info("------------------------------------")
-                # update pg results inspected so know to go to next pg at 20
-                page_results_processed += 1
-                back_to_results(driver)
-                # update so we have the recent count of results
-                gmaps_results = driver.find_elements(By.XPATH, places_xp)
+                if old is not None:
+                    place = merge_place(old, place)
+                seen.add(pid)
+                if index is not None:
+                    index.add(pid, query, place)
+                # commit the place with the cursor just past it
+                if store is not None:
+                    with metrics.stage("checkpoint"):
+                        store.save_place(
+                            query,
+                            pid,
+                            place,
+                            shard,
+                            (page, page_results_processed + 1),
+                        )
+                logger.info("Info scraped for r: %s", r)
+                yield pid, place
 
-        except TimeoutException:
-            # either it hasn't loaded
-            # or it has no stars as no reviews
-            # either way let's ditch it and move on
+            except TimeoutException:
+                # either it hasn't loaded
+                # or it has no stars as no reviews
+                # either way let's ditch it and move on
+                pass
+
+            # update pg results inspected so know to go to next pg at 20
             page_results_processed += 1
             logger.info("Going back to paginated results")
             logger.info("------------------------------------")
-            back_to_results(driver)
-            # update so we have the recent count of results
-            gmaps_results = driver.find_elements(By.XPATH, places_xp)
+            with metrics.stage("back_to_results"):
+                back_to_results(driver, wait)
+                # update so we have the recent count of results
+                links, cards = read_results(driver, with_cards)
+                in_range = within_km(links, orig_coords, max_distance)
+            # everything since the click is put down to this place
+            metrics.end_place(scraped)
 
         # if we've processed all our results
-        if len(gmaps_results) <= page_results_processed:
+        if len(links) <= page_results_processed:
             # if we have processed all results on this page
             if page_results_processed == 20:
                 # go to the next page and reset our processed results counter
                 logger.info("Loading new page of 20 results")
-                # then we need to head on over to the next page of results
-                next_button = driver.find_element(
-                    By.XPATH, "//button[@aria-label=' Next page ']"
-                )
-                click_element(driver, next_button)
+                with metrics.stage("next_page"):
+                    loaded = next_results_page(driver, wait)
+                if len(loaded) == 0:
+                    break
+                page += 1
                 page_results_processed = 0
-                # grab our first set of new results
-                random_delay(2)
-                gmaps_results = driver.find_elements(By.XPATH, places_xp)
+                links = None
             else:
                 # else we need to scroll down a bit to get new results
-                while len(gmaps_results) <= page_results_processed:
-                    logger.info("Scrolling to load new results")
-                    logger.info(
-                        "Have {} results but processed {}".format(
-                            len(gmaps_results), page_results_processed
-                        )
+                with metrics.stage("load_results"):
+                    loaded = load_results(
+                        driver, page_results_processed, wait
                     )
-                    # scroll down, wait, then grab new results
-                    results_xp = "//div[contains(@aria-label, 'Results for')]"
-                    scroll_down_results(driver, results_xp)
-                    random_delay(1)
-                    gmaps_results = driver.find_elements(By.XPATH, places_xp)
+                if len(loaded) <= page_results_processed:
+                    # no more results to be had
+                    break
+                links = None
+
+        # record how far through the search we are
+        if store is not None:
+            store.save_cursor(query, shard, (page, page_results_processed))
+
+    # mark search as done so a resume just returns what is stored
+    if store is not None:
+        store.save_cursor(
+            query, shard, (page, page_results_processed), finished=True
+        )
+
 
+def scrape_location(
+    driver: Chrome,
+    max_res: int,
+    max_revs: int,
+    orig_coords: Tuple[float, float],
+    max_distance: float,
+    shard: Tuple[int, int] = (0, 1),
+    results: Optional[Dict[str, dict]] = None,
+    store: Optional[CheckpointStore] = None,
+    query: str = "",
+    start: Tuple[int, int] = (0, 0),
+    wait: Optional[WaitPolicy] = None,
+    cache: Optional[PageCache] = None,
+) -> dict:
+
+    # vars to keep track of our results
+    # results can be passed in so the caller keeps what was scraped on error
+    if results is None:
+        results = {}
+    places = iter_location(
+        driver,
+        max_res,
+        max_revs,
+        orig_coords,
+        max_distance,
+        shard=shard,
+        store=store,
+        query=query,
+        start=start,
+        seen=set(results),
+        wait=wait,
+        cache=cache,
+    )
+    for pid, place in places:
+        results[pid] = place
     return results
@@ -1,32 +1,49 @@
+import copy
+import math
+import multiprocessing
+from collections import deque
+from multiprocessing import connection
+from typing import Dict, Iterator, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import quote_plus
+
 # selenium functions used to manipulate web browser
 from selenium.webdriver import Chrome
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.remote.webelement import BaseWebElement
-from webdriver_manager.chrome import ChromeDriverManager
 
 
 # helper functions to mask automated scrape
 from scrate import get_module_logger, get_root_dir
-from scrate.scrape import scrape_location
-from scrate.utils import get_geo, literal_search, random_delay
+from scrate.cache import PageCache
+from scrate.driver import DriverConfig, blocked_patterns, create_driver
+from scrate.index import PlaceIndex
+from scrate.metrics import enable_metrics, get_metrics
+from scrate.pipeline import iter_location_pipelined
+from scrate.pool import SessionPool
+from scrate.refresh import load_previous, unrefreshed
+from scrate.scrape import PLACES_XP, iter_location
+from scrate.sinks import JsonlSink, Sink, write_places
+from scrate.store import CheckpointStore, query_key
+from scrate.tabs import iter_location_tabs
+from scrate.tiles import BBox, plan_tiles
+from scrate.utils import RESULTS_LIST_XP, get_geo, literal_search
+from scrate.waits import DEFAULT_WAIT, WaitPolicy, title_changed, visible
 
 # set logger for this module
 logger = get_module_logger(__name__)
 
+# search for a type of place in the map view at a point and zoom level
+ANCHORED_URL = "https://www.google.co.uk/maps/search/{}/@{:.6f},{:.6f},{}z"
+
 
-def initiate_driver() -> Chrome:
-    # create chrome driver instance and start
-    logger.info("Starting Chrome driver sessions, installing...")
-    s = Service(ChromeDriverManager().install())
-    # add headless window arguments
-    # chrome_options = Options()
-    # chrome_options.add_argument("--headless")
-    # chrome_options.add_argument("--window-size={}".format("1920,1080"))
-    driver = Chrome(service=s)
-    logger.info("Chrome driver service installed, ready to go")
+def initiate_driver(config: Optional[DriverConfig] = None) -> Chrome:
+    # create chrome driver instance and start, see scrate.driver for the
+    # options e.g. driver.LIGHT for headless with heavy resources blocked
+    logger.info("Starting Chrome driver session")
+    driver = create_driver(config)
+    logger.info("Chrome driver started, ready to go")
     return driver
 
 
@@ -46,17 +63,21 @@ def start_session(driver: Chrome) -> Chrome:
     return driver
 
 
-def search_maps(driver: Chrome, search_term: str) -> Chrome:
+def search_maps(
+    driver: Chrome, search_term: str, wait: Optional[WaitPolicy] = None
+) -> Chrome:
+    wait = wait or DEFAULT_WAIT
     while True:
         # find search bar and clear it
         search_bar: BaseWebElement = driver.find_element(By.NAME, "q")
         search_bar.clear()
         # create a delay in sending the keys to avoid
-        logger.info("Searching for {} in search bar".format(search_term))
+        logger.info("Searching for %s in search bar", search_term)
         for letter in search_term:
-            random_delay(0.2, 0.1)
+            wait.pause("keystroke", 0.2, 0.1)
             search_bar.send_keys(letter)
         # 'press enter'
+        title_before = driver.title
         search_bar.send_keys(Keys.RETURN)
         # check if input is equal to entered
         input_new = (
@@ -66,73 +87,622 @@ def search_maps(driver: Chrome, search_term: str) -> Chrome:
             .strip()
         )
         if input_new == search_term:
-            # if so then delay and correct to be exact
-            random_delay(3)
+            # if so then wait for search and correct to be exact
+            wait.wait_for(driver, "search", title_changed(title_before), 3)
             literal_search(driver)
             break
         else:
             # else we're done so wait then return
-            random_delay(3)
-            pass
-    logger.info("Search for {} complete".format(search_term))
+            wait.wait_for(driver, "search", title_changed(title_before), 3)
+    logger.info("Search for %s complete", search_term)
+    return driver
+
+
+def search_session(
+    driver: Chrome,
+    place_name: str,
+    place_type: str,
+    wait: Optional[WaitPolicy] = None,
+) -> Chrome:
+
+    # run the searches in an already started session e.g. one from a pool
+    with get_metrics().stage("search"):
+        # search maps for the location of where we want to scan
+        driver = search_maps(driver, place_name, wait)
+        # search maps for the type of place we want e.g. cafe
+        driver = search_maps(driver, place_type, wait)
     return driver
 
 
-def start_searched_session(place_name: str, place_type: str) -> Chrome:
+def anchored_session(
+    driver: Chrome,
+    place_type: str,
+    anchor: Tuple[float, float, int],
+    wait: Optional[WaitPolicy] = None,
+) -> Chrome:
 
-    # initiate a chrome instance
-    driver = initiate_driver()
-    # start session
-    driver = start_session(driver)
-    # search maps for the location of where we want to scan
-    driver = search_maps(driver, place_name)
-    # search maps for the type of place we want e.g. cafe
-    driver = search_maps(driver, place_type)
+    # search for place_type around anchor, a (lat, lng, zoom), in place of
+    # searching for a place name, so the results are for that map view
+    wait = wait or DEFAULT_WAIT
+    lat, lng, zoom = anchor
+    with get_metrics().stage("search"):
+        logger.info("Searching for %s at %s,%s %sz", place_type, *anchor)
+        driver.get(ANCHORED_URL.format(quote_plus(place_type), lat, lng, zoom))
+        wait.wait_for(driver, "search", visible(RESULTS_LIST_XP), 3)
     return driver
 
 
+class SearchOptions:
+    """How searches scrape, the same for every search a call runs and
+    passed down as one so each layer doesn't repeat every option
+
+    Args:
+        checkpoint (str): SQLite file each place is committed to as it is
+            scraped, running again with the same path resumes the search
+        wait (WaitPolicy): Policy for waiting between steps, e.g.
+            ReadinessPolicy to wait on page conditions rather than fixed
+            sleeps, see wait.report()
+        page_cache (str): Directory each place's pane html is cached in, so
+            the parsers can be re-run later with scrate.reparse
+        page_cache_ttl (float): Seconds before a cached page expires, None
+            to keep pages forever
+        page_cache_max_bytes (int): Evict the least recently used cached
+            pages once they take more than this many bytes, None for no
+            limit
+        driver_config (DriverConfig): How chrome starts, e.g.
+            scrate.driver.LIGHT runs headless without downloading images,
+            fonts, media or map tiles
+        list_only (bool): Take what the result cards show (name, category,
+            price, rating, review count) without opening each place, much
+            faster but with no rating distribution, opening hours, popular
+            times or reviews
+        max_tabs (int): Above 1, open that many places at once as tabs of
+            the browser, driven over DevTools, see scrate.tabs
+        pipelined (bool): Load each place in a second window while the one
+            before is scraped, see scrate.pipeline
+        previous (Union[Dict[str, dict], str]): Earlier results to refresh,
+            as places by pid, the .jsonl file they were written to or the
+            earlier run's checkpoint file, see scrate.refresh. Use a new
+            checkpoint path for the refresh. search_location keeps the
+            earlier places the refresh doesn't reach again as they were,
+            iter_search only yields those it reaches
+    """
+
+    def __init__(
+        self,
+        checkpoint: Optional[str] = None,
+        wait: Optional[WaitPolicy] = None,
+        page_cache: Optional[str] = None,
+        driver_config: Optional[DriverConfig] = None,
+        list_only: bool = False,
+        max_tabs: int = 1,
+        pipelined: bool = False,
+        previous: Optional[Union[Dict[str, dict], str]] = None,
+        page_cache_ttl: Optional[float] = None,
+        page_cache_max_bytes: Optional[int] = None,
+    ) -> None:
+        self.checkpoint = checkpoint
+        self.wait = wait
+        self.page_cache = page_cache
+        self.driver_config = driver_config
+        self.list_only = list_only
+        self.max_tabs = max_tabs
+        self.pipelined = pipelined
+        self.previous = previous
+        self.page_cache_ttl = page_cache_ttl
+        self.page_cache_max_bytes = page_cache_max_bytes
+
+
+def iter_search(
+    place_name: str,
+    place_type: str,
+    max_results: int,
+    max_reviews: int,
+    max_distance: float,
+    shard: Tuple[int, int] = (0, 1),
+    options: Optional[SearchOptions] = None,
+    pool: Optional[SessionPool] = None,
+    index: Optional[PlaceIndex] = None,
+    anchor: Optional[Tuple[float, float, int]] = None,
+    listed: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, dict]]:
+
+    # yields (pid, place) one at a time rather than building a dict
+    # anchor is a (lat, lng, zoom) to search for place_type at, instead of
+    # searching for place_name, which then only names the query
+    # distances are measured from the anchor, else from where the search
+    # landed
+    # listed gets the pid of every result read, see iter_location
+    # if checkpointing, pick up where any previous run of this search got to
+    # places stored by that run are yielded first so a resumed iteration
+    # sees the same places as an uninterrupted one
+    options = options or SearchOptions()
+    wait = options.wait or DEFAULT_WAIT
+    metrics = get_metrics()
+    store: Optional[CheckpointStore] = None
+    # page_cache is a directory to keep each place's raw pane html in
+    cache: Optional[PageCache] = None
+    query = query_key(place_name, place_type)
+    start = (0, 0)
+    seen: Set[str] = set()
+    previous: Optional[Dict[str, dict]] = None
+    if options.previous is not None:
+        previous = load_previous(options.previous, query)
+    # the browser is quit when done, or handed back if it came from a pool
+    driver: Optional[Chrome] = None
+    # places this browser scraped, for the pool to recycle it by, those
+    # loaded from the checkpoint don't count
+    scraped = 0
+    try:
+        if options.checkpoint is not None:
+            store = CheckpointStore(options.checkpoint)
+            for pid, place in store.load_places(query, shard).items():
+                seen.add(pid)
+                if index is not None:
+                    index.add(pid, query, place)
+                yield pid, place
+            cursor = store.load_cursor(query, shard)
+            if cursor is not None:
+                if cursor[2]:
+                    logger.info(
+                        "Search for %s already complete, %s results",
+                        query,
+                        len(seen),
+                    )
+                    return
+                start = (cursor[0], cursor[1])
+
+        if options.page_cache is not None:
+            cache = PageCache(
+                options.page_cache,
+                ttl=options.page_cache_ttl,
+                max_bytes=options.page_cache_max_bytes,
+            )
+
+        # start chrome driver and nav to google, or take a started one from
+        # the pool, held before anything else so it is quit or handed back
+        # below even if the search fails
+        if pool is not None:
+            driver = pool.acquire()
+        else:
+            with metrics.stage("start_driver"):
+                driver = initiate_driver(options.driver_config)
+            with metrics.stage("start_session"):
+                start_session(driver)
+        # search place and type
+        if anchor is not None:
+            anchored_session(driver, place_type, anchor, wait)
+        else:
+            search_session(driver, place_name, place_type, wait)
+        # get original coords to prevent search straying too far, maps may
+        # re-centre an anchored search so keep to the anchor
+        if anchor is not None:
+            orig_coords = (anchor[0], anchor[1])
+        else:
+            orig_coords = get_geo(driver)
+        wait.pause("search", 2)
+
+        # try to identify raw results elements using url to gmaps data
+        gmaps_results = driver.find_elements(By.XPATH, PLACES_XP)
+
+        # if no results, report and return, the driver is closed below
+        if len(gmaps_results) == 0:
+            logger.error("No results for %s in: %s", place_type, place_name)
+            return
+        else:
+            # else we must have results so let's get scraping them
+            logger.info("Results found, starting scraping")
+            wait.pause("search", 2)
+
+        # the windows the faster modes open block what the first one does
+        config = pool.driver_config if pool is not None else None
+        config = config or options.driver_config or DriverConfig()
+        blocked_urls = blocked_patterns(config)
+        # list only never opens places, and refreshing compares each card
+        # with the earlier run, so both run serially
+        serial = options.list_only or previous is not None
+        if options.max_tabs > 1 and not serial:
+            # scrape several places at once in tabs of this browser
+            places = iter_location_tabs(
+                driver,
+                max_results,
+                max_reviews,
+                orig_coords,
+                max_distance,
+                max_tabs=options.max_tabs,
+                shard=shard,
+                store=store,
+                query=query,
+                start=start,
+                seen=seen,
+                wait=wait,
+                cache=cache,
+                index=index,
+                blocked_urls=blocked_urls,
+                listed=listed,
+            )
+        elif options.pipelined and not serial:
+            # load the next place in a second window while this one is
+            # scraped and parsed
+            places = iter_location_pipelined(
+                driver,
+                max_results,
+                max_reviews,
+                orig_coords,
+                max_distance,
+                shard=shard,
+                store=store,
+                query=query,
+                start=start,
+                seen=seen,
+                wait=wait,
+                cache=cache,
+                index=index,
+                blocked_urls=blocked_urls,
+                listed=listed,
+            )
+        else:
+            # scrape results one at a time
+            places = iter_location(
+                driver,
+                max_results,
+                max_reviews,
+                orig_coords,
+                max_distance,
+                shard=shard,
+                store=store,
+                query=query,
+                start=start,
+                seen=seen,
+                wait=wait,
+                cache=cache,
+                index=index,
+                list_only=options.list_only,
+                previous=previous,
+                listed=listed,
+            )
+        for pid, place in places:
+            scraped += 1
+            yield pid, place
+    finally:
+        if driver is not None:
+            if pool is not None:
+                pool.release(driver, scraped)
+            else:
+                driver.quit()
+        if store is not None:
+            store.close()
+        if cache is not None:
+            cache.close()
+
+
+def search_worker(
+    place_name: str,
+    place_type: str,
+    max_results: int,
+    max_reviews: int,
+    max_distance: float,
+    shard: Tuple[int, int],
+    results: connection.Connection,
+    options: Optional[SearchOptions] = None,
+    record_metrics: bool = False,
+) -> None:
+
+    # runs in its own process with its own driver, scraping only its shard
+    # each ("place", pid, place) is sent to the parent as soon as it is
+    # scraped, so the parent keeps it whatever happens to this process later
+    # with record_metrics, ("metrics", recorder) is sent last for the parent
+    # to merge, recorded from scratch as a forked worker would otherwise
+    # start with the parent's counts
+    metrics = enable_metrics() if record_metrics else get_metrics()
+    count = 0
+    try:
+        places = iter_search(
+            place_name,
+            place_type,
+            max_results,
+            max_reviews,
+            max_distance,
+            shard=shard,
+            options=options,
+        )
+        for pid, place in places:
+            results.send(("place", pid, place))
+            count += 1
+    except Exception:
+        logger.exception(
+            "Worker %s of %s failed after %s results",
+            shard[0],
+            shard[1],
+            count,
+        )
+    finally:
+        if record_metrics:
+            results.send(("metrics", metrics))
+        results.close()
+
+
 def search_location(
     place_name: str,
     place_type: str,
     max_results: int = 100,
     max_reviews: int = 100,
-    max_distance: float = 0.2,
+    max_distance: float = 20.0,
+    workers: int = 1,
+    sinks: Sequence[Sink] = (),
+    options: Optional[SearchOptions] = None,
+    pool: Optional[SessionPool] = None,
 ) -> dict:
 
-    # start chrome driver, nav to google, search place and type
-    driver: Chrome = start_searched_session(place_name, place_type)
-    # get original coords to prevent search straying too far
-    orig_coords = get_geo(driver)
-    random_delay(2)
-
-    # try to identify raw results elements using url to gmaps data
-    gmaps_xp = "//*[contains(@href,'https://www.google.co.uk/maps/place/')]"
-    gmaps_results = driver.find_elements(By.XPATH, gmaps_xp)
-
-    # if no results, report, close driver, return empty dict
-    if len(gmaps_results) == 0:
-        logger.error("No results for {} in: {}".format(place_type, place_name))
-        # close
-        driver.close()
-        return {}
-    else:
-        # else we must have results so let's get scraping them
-        logger.info("Results found, starting scraping")
-        random_delay(2)
-
-    # scrape results and return
-    results = scrape_location(
-        driver, max_results, max_reviews, orig_coords, max_distance
-    )
+    # max_distance is in km from where the search landed, further places
+    # in the results are skipped without being opened
+    # sinks are written to as places arrive, for a run that doesn't hold
+    # every place in memory iterate over iter_search with write_places
+    # options sets how the search scrapes, see SearchOptions
+    # pool is a SessionPool to take an already started browser from and
+    # return it to, so repeated searches skip starting chrome each time
+    if pool is not None and workers > 1:
+        raise ValueError("A session pool can only be used with one worker")
+
+    # when refreshing, load the earlier results once for every worker and
+    # start from them, overlaid with the places the refresh reaches
+    previous: Optional[Dict[str, dict]] = None
+    if options is not None and options.previous is not None:
+        previous = load_previous(
+            options.previous, query_key(place_name, place_type)
+        )
+        options = copy.copy(options)
+        options.previous = previous
+
+    # single browser, scrape in this process
+    if workers <= 1:
+        places = iter_search(
+            place_name,
+            place_type,
+            max_results,
+            max_reviews,
+            max_distance,
+            options=options,
+            pool=pool,
+        )
+        results = dict(write_places(places, sinks))
+        if previous is not None:
+            kept = unrefreshed(previous, results)
+            results.update(write_places(kept, sinks))
+        return results
+
+    # else shard results by index across workers, each with its own driver
+    # every worker runs the same search so sees the same result ordering
+    # each worker is a process of its own sending places back over its own
+    # pipe, so one dying (killed, out of memory...) loses only the rest of
+    # its shard, where with a pool executor every result would fail
+    worker_max = math.ceil(max_results / workers)
+    metrics = get_metrics()
+    results: Dict[str, dict] = {}
+    readers: Dict[connection.Connection, int] = {}
+    processes = []
+    try:
+        for i in range(workers):
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=search_worker,
+                args=(place_name, place_type, worker_max, max_reviews),
+                kwargs={
+                    "max_distance": max_distance,
+                    "shard": (i, workers),
+                    "results": writer,
+                    "options": options,
+                    "record_metrics": metrics.enabled,
+                },
+                name="scrate-worker-{}".format(i),
+            )
+            process.start()
+            # only the worker writes, so its end closing shows as EOF here
+            writer.close()
+            processes.append(process)
+            readers[reader] = i
+        while readers:
+            for reader in connection.wait(list(readers)):
+                try:
+                    item = reader.recv()
+                except EOFError:
+                    i = readers.pop(reader)
+                    reader.close()
+                    processes[i].join()
+                    if processes[i].exitcode:
+                        logger.error(
+                            "Worker %s of %s exited with code %s",
+                            i,
+                            workers,
+                            processes[i].exitcode,
+                        )
+                    continue
+                if item[0] == "metrics":
+                    metrics.merge(item[1])
+                    continue
+                # never overwriting a place another worker already has
+                _, pid, place = item
+                if pid in results or len(results) >= max_results:
+                    continue
+                results[pid] = place
+                for sink in sinks:
+                    sink.write(pid, place)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    logger.info("%s workers finished with %s results", workers, len(results))
+    if previous is not None:
+        kept = unrefreshed(previous, results)
+        results.update(write_places(kept, sinks))
     return results
 
 
-if __name__ == "__main__":
+def indexed_places(
+    index: PlaceIndex, query: str, results: Dict[str, dict]
+) -> Iterator[Tuple[str, dict]]:
+
+    # places matched by query that aren't in results, i.e. ones an earlier
+    # run scraped, which the search counts without opening or yielding,
+    # as kept by an index in sqlite
+    for pid in index.pids_for(query):
+        if pid in results:
+            continue
+        place = index.load_place(pid)
+        if place is None:
+            logger.error("No record of indexed place %s", pid)
+            continue
+        yield pid, place
+
+
+def search_locations(
+    queries: Sequence[Tuple[str, str]],
+    max_results: int = 100,
+    max_reviews: int = 100,
+    max_distance: float = 20.0,
+    sinks: Sequence[Sink] = (),
+    options: Optional[SearchOptions] = None,
+    pool: Optional[SessionPool] = None,
+    index_path: Optional[str] = None,
+) -> dict:
+
+    # run a batch of (place_name, place_type) queries one after another in
+    # pooled browsers, returning every place found keyed by pid
+    # a place found by an earlier query isn't opened again, the later query
+    # is added to its "queries", the list of queries that matched it
+    # max_results etc. apply to each query, as for search_location
+    # sinks get each place once the whole batch is done, as a place's
+    # queries aren't known until then
+    # index_path is a sqlite file to keep the index of scraped places in,
+    # so places scraped by an earlier batch aren't opened again either,
+    # the places are kept in it too and returned as they were scraped
+    options = options or SearchOptions()
+    own_pool = pool is None
+    if own_pool:
+        pool = SessionPool(driver_config=options.driver_config)
+    index = PlaceIndex(index_path)
+    results: Dict[str, dict] = {}
+    try:
+        for place_name, place_type in queries:
+            places = iter_search(
+                place_name,
+                place_type,
+                max_results,
+                max_reviews,
+                max_distance,
+                options=options,
+                pool=pool,
+                index=index,
+            )
+            for pid, place in places:
+                results[pid] = place
+            query = query_key(place_name, place_type)
+            results.update(indexed_places(index, query, results))
+            logger.info(
+                "%s places after %s in %s",
+                len(results),
+                place_type,
+                place_name,
+            )
+    finally:
+        index.close()
+        if own_pool:
+            pool.close()
+    for pid, place in results.items():
+        place["queries"] = index.queries_for(pid)
+        for sink in sinks:
+            sink.write(pid, place)
+    return results
+
+
+def search_area(
+    place_type: str,
+    bbox: Optional[BBox] = None,
+    centre: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+    cell_km: float = 2.0,
+    cap: int = 120,
+    min_cell_km: float = 0.25,
+    max_reviews: int = 100,
+    sinks: Sequence[Sink] = (),
+    options: Optional[SearchOptions] = None,
+    pool: Optional[SessionPool] = None,
+    index_path: Optional[str] = None,
+) -> dict:
+
+    # cover an area with a grid of cells about cell_km across, over the
+    # bbox (south, west, north, east) or the circle radius_km around centre
+    # each cell is searched for place_type at its own map view, keeping the
+    # places within reach of the cell
+    # maps returns at most about cap results for a query, so a cell that
+    # gets that many is split into four and each quarter searched as well,
+    # down to cells min_cell_km across
+    # a place found by more than one cell is only scraped once, as for
+    # search_locations, so sinks are written to as places arrive
+    options = options or SearchOptions()
+    tiles = deque(plan_tiles(bbox, centre, radius_km, cell_km))
+    logger.info("Searching %s cells for %s", len(tiles), place_type)
+    own_pool = pool is None
+    if own_pool:
+        pool = SessionPool(driver_config=options.driver_config)
+    window_size = (pool.driver_config or DriverConfig()).window_size
+    index = PlaceIndex(index_path)
+    results: Dict[str, dict] = {}
+    try:
+        while tiles:
+            tile = tiles.popleft()
+            listed: Set[str] = set()
+            places = iter_search(
+                tile.key,
+                place_type,
+                cap,
+                max_reviews,
+                tile.radius_km,
+                options=options,
+                pool=pool,
+                index=index,
+                anchor=tile.anchor(window_size),
+                listed=listed,
+            )
+            for pid, place in write_places(places, sinks):
+                results[pid] = place
+            query = query_key(tile.key, place_type)
+            earlier = indexed_places(index, query, results)
+            results.update(write_places(earlier, sinks))
+            # the results maps listed for the cell, in reach or not, which a
+            # cell resumed as already complete only has from the index
+            found = max(len(listed), index.count(query))
+            logger.info(
+                "%s results in cell %s, %s places in all",
+                found,
+                tile.key,
+                len(results),
+            )
+            # saturated so likely more places than one query shows
+            if found >= cap and tile.width_km / 2 >= min_cell_km:
+                logger.info("Splitting cell %s", tile.key)
+                tiles.extend(tile.split())
+    finally:
+        index.close()
+        if own_pool:
+            pool.close()
+    return results
+
 
-    results = search_location(
-        "granada", "restaurant", max_results=250, max_reviews=0
-    )
-    import pickle
+if __name__ == "__main__":
 
-    with open(get_root_dir() + "/reviews.pickle", "wb") as handle:
-        pickle.dump(results, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    # record where the time goes
+    metrics = enable_metrics()
+    # stream places to a jsonl file as they are scraped
+    with JsonlSink(get_root_dir() + "/reviews.jsonl") as sink:
+        results = search_location(
+            "granada",
+            "restaurant",
+            max_results=250,
+            max_reviews=0,
+            sinks=[sink],
+            options=SearchOptions(checkpoint=get_root_dir() + "/reviews.db"),
+        )
+    metrics.write_json(get_root_dir() + "/metrics.json")
+    metrics.write_prometheus(get_root_dir() + "/metrics.prom")
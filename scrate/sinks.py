@@ -0,0 +1,248 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from scrate import get_module_logger
+from scrate.popular_times import (
+    DAYS,
+    HOUR_LABELS,
+    MISSING,
+    popular_times_array,
+)
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+
+def flatten_place(
+    pid: str, place: dict
+) -> Tuple[dict, List[dict], List[dict]]:
+
+    # split a place into a places row, review rows and popular times rows
+    # all linked back to the place by pid
+    general: dict = place.get("general", {})
+    place_row = {
+        "pid": pid,
+        "name": general.get("name", ""),
+        "category": general.get("category", ""),
+        "price": general.get("price", 0),
+        "review_count": general.get("review_count", 0),
+        "rating": general.get("rating"),
+        "rating_dist": list(general.get("rating_dist", [])),
+        "opening_hours": list(general.get("opening_hours", [])),
+        "queries": list(place.get("queries", [])),
+    }
+    review_rows = [
+        {
+            "pid": pid,
+            "review_id": r.get("review_id", ""),
+            "age": r.get("age", ""),
+            "reviewer_count": r.get("reviewer_count", 0),
+            "rating": r.get("rating", 0),
+        }
+        for r in place.get("reviews", [])
+    ]
+    busyness = popular_times_array(place.get("popular_times", []))
+    popular_times_rows = [
+        {
+            "pid": pid,
+            "day": DAYS[day],
+            "time_string": HOUR_LABELS[hour],
+            "hour": int(hour),
+            "busyness": int(busyness[day, hour]),
+        }
+        for day, hour in zip(*np.nonzero(busyness != MISSING))
+    ]
+    return place_row, review_rows, popular_times_rows
+
+
+def to_json(value):
+    # popular times arrays as nested lists (7 days of 24 hours, 255 for
+    # no bar), anything else json can't hold e.g. datetime.time as a string
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+class Sink:
+    """Destination that places are written to one at a time as they are
+    scraped, usable as a context manager so it is always closed
+    """
+
+    def write(self, pid: str, place: dict) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlSink(Sink):
+    """Writes one json line per place, flushed as each place arrives
+
+    Args:
+        path (str): File to write to
+        mode (str): 'w' to overwrite or 'a' to append to an existing file
+    """
+
+    def __init__(self, path: str, mode: str = "w") -> None:
+        self.path = path
+        self.fd = open(path, mode, encoding="utf-8")
+
+    def write(self, pid: str, place: dict) -> None:
+        record = {"pid": pid}
+        record.update(place)
+        self.fd.write(json.dumps(record, default=to_json) + "\n")
+        self.fd.flush()
+
+    def close(self) -> None:
+        self.fd.close()
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, dict]]:
+
+    # (pid, place) for each line a JsonlSink wrote, popular times back
+    # as the (7, 24) array
+    with open(path, encoding="utf-8") as fd:
+        for line in fd:
+            if not line.strip():
+                continue
+            place = json.loads(line)
+            pid = place.pop("pid")
+            if "popular_times" in place:
+                place["popular_times"] = np.asarray(
+                    place["popular_times"], dtype=np.uint8
+                )
+            yield pid, place
+
+
+class ParquetSink(Sink):
+    """Writes places, reviews and popular times as three flat parquet
+    datasets linked by pid. Rows are buffered and each full buffer is
+    written as its own part file, so the directories can be read with
+    pandas.read_parquet while the scrape is still running
+
+    Args:
+        directory (str): Directory to write the places/, reviews/ and
+            popular_times/ datasets into
+        row_group_size (int): Number of places buffered before writing
+    """
+
+    TABLES = ("places", "reviews", "popular_times")
+
+    def __init__(self, directory: str, row_group_size: int = 500) -> None:
+        # pyarrow is only needed when writing parquet so import it here
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "ParquetSink requires pyarrow, install it to write parquet"
+            ) from e
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.schemas = {
+            "places": pyarrow.schema(
+                [
+                    ("pid", pyarrow.string()),
+                    ("name", pyarrow.string()),
+                    ("category", pyarrow.string()),
+                    ("price", pyarrow.int8()),
+                    ("review_count", pyarrow.int64()),
+                    ("rating", pyarrow.float32()),
+                    ("rating_dist", pyarrow.list_(pyarrow.string())),
+                    ("opening_hours", pyarrow.list_(pyarrow.string())),
+                    ("queries", pyarrow.list_(pyarrow.string())),
+                ]
+            ),
+            "reviews": pyarrow.schema(
+                [
+                    ("pid", pyarrow.string()),
+                    ("review_id", pyarrow.string()),
+                    ("age", pyarrow.string()),
+                    ("reviewer_count", pyarrow.int32()),
+                    ("rating", pyarrow.int8()),
+                ]
+            ),
+            "popular_times": pyarrow.schema(
+                [
+                    ("pid", pyarrow.string()),
+                    ("day", pyarrow.string()),
+                    ("time_string", pyarrow.string()),
+                    ("hour", pyarrow.int8()),
+                    ("busyness", pyarrow.uint8()),
+                ]
+            ),
+        }
+        self.buffers: Dict[str, List[dict]] = {t: [] for t in self.TABLES}
+        self.buffered_places = 0
+        for table in self.TABLES:
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+        # carry on numbering after any parts from an earlier run
+        self.parts = len(
+            [
+                f
+                for f in os.listdir(os.path.join(directory, "places"))
+                if f.endswith(".parquet")
+            ]
+        )
+
+    def write(self, pid: str, place: dict) -> None:
+        place_row, review_rows, popular_times_rows = flatten_place(pid, place)
+        self.buffers["places"].append(place_row)
+        self.buffers["reviews"].extend(review_rows)
+        self.buffers["popular_times"].extend(popular_times_rows)
+        self.buffered_places += 1
+        if self.buffered_places >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        # write each buffered table out as a new part file
+        if self.buffered_places == 0:
+            return
+        for table in self.TABLES:
+            rows = self.buffers[table]
+            if len(rows) == 0:
+                continue
+            arrow_table = self.pa.Table.from_pylist(
+                rows, schema=self.schemas[table]
+            )
+            name = "part-{:05d}.parquet".format(self.parts)
+            path = os.path.join(self.directory, table, name)
+            # write to a temp name then rename so readers never see a half
+            # written file, files starting with _ are ignored by readers
+            tmp_path = os.path.join(self.directory, table, "_" + name)
+            self.pq.write_table(arrow_table, tmp_path)
+            os.replace(tmp_path, path)
+            rows.clear()
+        logger.info(
+            "Wrote part %s with %s places to %s",
+            self.parts,
+            self.buffered_places,
+            self.directory,
+        )
+        self.parts += 1
+        self.buffered_places = 0
+
+    def close(self) -> None:
+        self.flush()
+
+
+def write_places(
+    places: Iterable[Tuple[str, dict]], sinks: Sequence[Sink]
+) -> Iterator[Tuple[str, dict]]:
+
+    # pass places through, writing each to every sink on the way
+    for pid, place in places:
+        for sink in sinks:
+            sink.write(pid, place)
+        yield pid, place
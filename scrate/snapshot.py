@@ -0,0 +1,44 @@
+from typing import TYPE_CHECKING
+
+from scrate.extract import as_tree
+from scrate.metrics import get_metrics
+
+if TYPE_CHECKING:
+    # only for annotations, so parsing never imports selenium
+    from selenium.webdriver import Chrome
+
+# fetch the tab title and only the left hand place pane in one round trip
+# rather than transferring the whole document via page_source
+PANE_JS = """
+var pane = document.getElementById('pane');
+return [document.title, pane ? pane.outerHTML : ''];
+"""
+
+
+class PlaceSnapshot:
+    """Parsed copy of a single place's detail pane, fetched and parsed once
+    and shared by every extractor for that place
+
+    Args:
+        title (str): Title of the browser tab e.g. 'Cafe - Google Maps'
+        html (str): outerHTML of the '#pane' element
+    """
+
+    def __init__(self, title: str, html: str) -> None:
+        self.title = title
+        self.html = html
+        # parsed once with lxml, extractors run compiled xpaths against it
+        self.tree = as_tree(html)
+
+    @property
+    def name(self) -> str:
+        # strip place name from tab title
+        return self.title.replace(" - Google Maps", "")
+
+
+def take_snapshot(driver: "Chrome") -> PlaceSnapshot:
+    # grab title and pane html with a single webdriver command
+    title, html = driver.execute_script(PANE_JS)
+    html = html or ""
+    get_metrics().transfer(len(html))
+    return PlaceSnapshot(title or "", html)
@@ -0,0 +1,135 @@
+import pickle
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+from scrate import get_module_logger
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    query TEXT NOT NULL,
+    pid TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (query, pid)
+);
+CREATE TABLE IF NOT EXISTS cursors (
+    query TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    page_results_processed INTEGER NOT NULL,
+    finished INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (query, shard)
+);
+"""
+
+
+def query_key(place_name: str, place_type: str) -> str:
+    # identifies a search in the store e.g. 'restaurant in granada'
+    return "{} in {}".format(place_type, place_name)
+
+
+def shard_key(shard: Tuple[int, int]) -> str:
+    return "{}/{}".format(*shard)
+
+
+class CheckpointStore:
+    """SQLite backed store that commits each place as soon as it is scraped
+    along with the search cursor, so an interrupted search can be resumed
+
+    Args:
+        path (str): Path to the sqlite database file, created if missing
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # generous timeout as parallel workers may share the file
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def save_place(
+        self,
+        query: str,
+        pid: str,
+        place: dict,
+        shard: Tuple[int, int],
+        cursor: Tuple[int, int],
+    ) -> None:
+        # place and the cursor past it are committed together so a crash
+        # never leaves one without the other
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?)",
+                (
+                    query,
+                    pid,
+                    shard_key(shard),
+                    pickle.dumps(place, protocol=pickle.HIGHEST_PROTOCOL),
+                ),
+            )
+            self._set_cursor(query, shard, cursor)
+
+    def save_cursor(
+        self,
+        query: str,
+        shard: Tuple[int, int],
+        cursor: Tuple[int, int],
+        finished: bool = False,
+    ) -> None:
+        with self.conn:
+            self._set_cursor(query, shard, cursor, finished)
+
+    def _set_cursor(
+        self,
+        query: str,
+        shard: Tuple[int, int],
+        cursor: Tuple[int, int],
+        finished: bool = False,
+    ) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cursors VALUES (?, ?, ?, ?, ?)",
+            (query, shard_key(shard), cursor[0], cursor[1], int(finished)),
+        )
+
+    def load_cursor(
+        self, query: str, shard: Tuple[int, int]
+    ) -> Optional[Tuple[int, int, bool]]:
+        # returns (page, page_results_processed, finished) or None if new
+        row = self.conn.execute(
+            "SELECT page, page_results_processed, finished FROM cursors "
+            "WHERE query = ? AND shard = ?",
+            (query, shard_key(shard)),
+        ).fetchone()
+        if row is None:
+            return None
+        return (row[0], row[1], bool(row[2]))
+
+    def has_place(self, query: str, pid: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM places WHERE query = ? AND pid = ?", (query, pid)
+        ).fetchone()
+        return row is not None
+
+    def load_places(
+        self, query: str, shard: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, dict]:
+        # all places for the query, or only those scraped by one shard
+        # insertion order matches scrape order as rowid increases
+        if shard is None:
+            rows = self.conn.execute(
+                "SELECT pid, data FROM places WHERE query = ? ORDER BY rowid",
+                (query,),
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT pid, data FROM places WHERE query = ? AND shard = ? "
+                "ORDER BY rowid",
+                (query, shard_key(shard)),
+            )
+        return {pid: pickle.loads(data) for pid, data in rows}
+
+    def close(self) -> None:
+        self.conn.close()
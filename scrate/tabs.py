@@ -0,0 +1,555 @@
+import asyncio
+import itertools
+import json
+import threading
+import urllib.request
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from scrate import get_module_logger
+from scrate.cache import PageCache
+from scrate.geo import within_km
+from scrate.index import PlaceIndex, place_key
+from scrate.metrics import get_metrics
+from scrate.parse import parse_general_info
+from scrate.popular_times import get_popular_times
+from scrate.reviews import (
+    REVIEWS_BOX_CSS,
+    REVIEWS_JS,
+    REVIEWS_XP,
+    parse_review,
+)
+from scrate.scrape import (
+    MORE_REVIEWS_XP,
+    load_results,
+    next_results_page,
+    result_links,
+    resume_results,
+)
+from scrate.snapshot import PANE_JS, PlaceSnapshot
+from scrate.store import CheckpointStore
+from scrate.waits import DEFAULT_WAIT, WaitPolicy
+
+if TYPE_CHECKING:
+    from selenium.webdriver import Chrome
+
+# set logger for this module
+logger = get_module_logger(__name__)
+
+# opens places as tabs of the browser a search is already running in and
+# drives up to max_tabs of them at once over the DevTools protocol, so a
+# page loading in one tab no longer holds up the others
+# every tab shares the one browser process, which is where the memory goes
+
+# present once a place's pane has loaded, as waited on by iter_location
+PLACE_READY_XP = "//tr[contains(@aria-label,'stars')]"
+
+# the scripts below are function bodies taking arguments, as for
+# execute_script, see Tab.call
+# ignores a document we've navigated away from, which reused tabs may
+# still be showing just after a navigation
+EXISTS_JS = """
+return !window.scrateStale && document.evaluate(
+    arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue !== null;
+"""
+
+CLICK_JS = """
+var el = document.evaluate(
+    arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+if (el === null) {
+    return false;
+}
+el.click();
+return true;
+"""
+
+COUNT_JS = """
+return document.evaluate(
+    arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+).snapshotLength;
+"""
+
+SCROLL_BOX_JS = """
+var box = document.querySelector(arguments[0]);
+if (box !== null) {
+    box.scrollTo(0, box.scrollHeight);
+}
+"""
+
+
+def devtools_url(driver: "Chrome") -> str:
+    # websocket url of the browser chromedriver started, which chrome
+    # serves from the debugging port chromedriver gave it
+    address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+    with urllib.request.urlopen(
+        "http://{}/json/version".format(address), timeout=10
+    ) as resp:
+        return json.load(resp)["webSocketDebuggerUrl"]
+
+
+class DevTools:
+    """Connection to the browser's DevTools websocket, shared by every tab.
+    Commands are awaited from the event loop while a reader thread hands
+    each response to the command waiting on it. Events aren't used, the
+    tabs poll the page instead.
+
+    Args:
+        ws_url (str): Browser websocket url, see devtools_url
+        loop (asyncio.AbstractEventLoop): Loop the commands are awaited in
+        timeout (float): Seconds to wait for any one response
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        loop: asyncio.AbstractEventLoop,
+        timeout: float = 30,
+    ) -> None:
+        # websocket-client is installed along with selenium
+        import websocket
+
+        # chrome refuses websockets sending an Origin it doesn't expect
+        self.ws = websocket.create_connection(
+            ws_url, suppress_origin=True, enable_multithread=True
+        )
+        self.loop = loop
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.reader = threading.Thread(
+            target=self._read, name="scrate-devtools", daemon=True
+        )
+        self.reader.start()
+
+    def _read(self) -> None:
+        while True:
+            try:
+                raw = self.ws.recv()
+            except Exception:
+                # closed, by us or the browser
+                break
+            if not raw:
+                continue
+            message = json.loads(raw)
+            if "id" in message:
+                self.loop.call_soon_threadsafe(self._resolve, message)
+
+    def _resolve(self, message: dict) -> None:
+        future = self.pending.pop(message["id"], None)
+        if future is None or future.done():
+            return
+        if "error" in message:
+            error = message["error"].get("message")
+            future.set_exception(
+                RuntimeError("DevTools error: {}".format(error))
+            )
+        else:
+            future.set_result(message.get("result", {}))
+
+    async def send(
+        self,
+        method: str,
+        params: Optional[dict] = None,
+        session_id: Optional[str] = None,
+    ) -> dict:
+        command_id = next(self.ids)
+        message: Dict[str, Any] = {
+            "id": command_id,
+            "method": method,
+            "params": params or {},
+        }
+        if session_id is not None:
+            message["sessionId"] = session_id
+        future = self.loop.create_future()
+        self.pending[command_id] = future
+        get_metrics().command(method)
+        self.ws.send(json.dumps(message))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self.pending.pop(command_id, None)
+
+    def close(self) -> None:
+        self.ws.close()
+        self.reader.join(timeout=1)
+
+
+class Tab:
+    """One browser tab, attached to over a DevTools session
+
+    Args:
+        devtools (DevTools): Browser connection
+        target_id (str): DevTools id of the tab
+        session_id (str): Session commands for the tab are sent on
+    """
+
+    def __init__(
+        self, devtools: DevTools, target_id: str, session_id: str
+    ) -> None:
+        self.devtools = devtools
+        self.target_id = target_id
+        self.session_id = session_id
+
+    @classmethod
+    async def open(
+        cls, devtools: DevTools, blocked_urls: Sequence[str] = ()
+    ) -> "Tab":
+        created = await devtools.send(
+            "Target.createTarget", {"url": "about:blank", "background": True}
+        )
+        attached = await devtools.send(
+            "Target.attachToTarget",
+            {"targetId": created["targetId"], "flatten": True},
+        )
+        tab = cls(devtools, created["targetId"], attached["sessionId"])
+        # background tabs get their timers throttled, which would slow
+        # maps loading in every tab but the focused one
+        await tab.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+        # blocking set up by create_driver only covers the driver's own tab
+        if blocked_urls:
+            await tab.send("Network.enable")
+            await tab.send(
+                "Network.setBlockedURLs", {"urls": list(blocked_urls)}
+            )
+        return tab
+
+    async def send(self, method: str, params: Optional[dict] = None) -> dict:
+        return await self.devtools.send(method, params, self.session_id)
+
+    async def navigate(self, url: str) -> None:
+        # mark the current document so waits don't match it, see EXISTS_JS
+        await self.call("window.scrateStale = true;")
+        await self.send("Page.navigate", {"url": url})
+
+    async def call(self, body: str, *args: Any) -> Any:
+        # run a script body as execute_script would, arguments[i] being
+        # args[i], returning its value, awaited if it is a promise
+        expression = "(function() {{{}}}).apply(null, {})".format(
+            body, json.dumps(args)
+        )
+        result = await self.send(
+            "Runtime.evaluate",
+            {
+                "expression": expression,
+                "returnByValue": True,
+                "awaitPromise": True,
+            },
+        )
+        if "exceptionDetails" in result:
+            raise RuntimeError(
+                "Script error: {}".format(result["exceptionDetails"]["text"])
+            )
+        return result["result"].get("value")
+
+    async def wait_for(
+        self, xpath: str, timeout: float, interval: float = 0.25
+    ) -> bool:
+        # poll for an element, other tabs run in between polls
+        # the page may still be mid navigation so script errors are retried
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                if await self.call(EXISTS_JS, xpath):
+                    return True
+            except RuntimeError:
+                pass
+            if asyncio.get_running_loop().time() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        await self.devtools.send(
+            "Target.closeTarget", {"targetId": self.target_id}
+        )
+
+
+class TabEngine:
+    """Scrapes places as tabs of one already running browser, up to
+    max_tabs at a time, giving the same place dicts as iter_location.
+    The tabs are opened once and reused for place after place.
+
+    Args:
+        driver (Chrome): Browser to open the tabs in
+        max_tabs (int): Places loading or being scraped at once
+        blocked_urls (Sequence[str]): Url patterns not to download, see
+            driver.blocked_patterns
+        timeout (float): Seconds to wait for a place or its reviews to load
+        max_stalls (int): Scrolls in a row finding no new reviews before
+            giving up on getting more
+        cache (PageCache): Where to keep each place's pane html, if anywhere
+    """
+
+    def __init__(
+        self,
+        driver: "Chrome",
+        max_tabs: int = 4,
+        blocked_urls: Sequence[str] = (),
+        timeout: float = 10,
+        max_stalls: int = 3,
+        cache: Optional[PageCache] = None,
+    ) -> None:
+        self.max_tabs = max_tabs
+        self.blocked_urls = tuple(blocked_urls)
+        self.timeout = timeout
+        self.max_stalls = max_stalls
+        self.cache = cache
+        # our own loop, kept across batches as the connection is bound to it
+        self.loop = asyncio.new_event_loop()
+        self.devtools = DevTools(devtools_url(driver), self.loop)
+        self.tabs: List[Tab] = []
+
+    async def _reviews(self, tab: Tab, max_reviews: int) -> List[dict]:
+
+        # open the reviews section then scroll it until enough have loaded
+        if not await tab.wait_for(MORE_REVIEWS_XP, self.timeout):
+            logger.error("Unable to locate the 'More reviews' button")
+            return []
+        await tab.call(CLICK_JS, MORE_REVIEWS_XP)
+        if not await tab.wait_for(REVIEWS_XP, self.timeout):
+            return []
+        count = 0
+        stalls = 0
+        while stalls < self.max_stalls:
+            loaded = await tab.call(COUNT_JS, REVIEWS_XP)
+            if loaded >= max_reviews:
+                break
+            stalls = 0 if loaded > count else stalls + 1
+            count = loaded
+            await tab.call(SCROLL_BOX_JS, REVIEWS_BOX_CSS)
+            await asyncio.sleep(1)
+        raw_json: str = await tab.call(REVIEWS_JS, REVIEWS_XP, max_reviews)
+        get_metrics().transfer(len(raw_json))
+        return [parse_review(r) for r in json.loads(raw_json)]
+
+    async def _place(
+        self, tab: Tab, pid: str, href: str, max_reviews: int
+    ) -> Optional[dict]:
+
+        # None if the place doesn't load, or has no stars as no reviews,
+        # which iter_location skips as well
+        metrics = get_metrics()
+        with metrics.stage("open_place"):
+            await tab.navigate(href)
+            if not await tab.wait_for(PLACE_READY_XP, self.timeout):
+                return None
+        with metrics.stage("snapshot"):
+            pane = await tab.call(PANE_JS)
+            if pane is None:
+                # the document went away under the script
+                logger.error("No pane read for %s", pid)
+                return None
+            title, html = pane
+            html = html or ""
+            metrics.transfer(len(html))
+            snapshot = PlaceSnapshot(title or "", html)
+        if self.cache is not None:
+            with metrics.stage("cache"):
+                self.cache.put(pid, snapshot)
+        with metrics.stage("general_info"):
+            general_info = parse_general_info(snapshot)
+        with metrics.stage("popular_times"):
+            popular_times = get_popular_times(snapshot.tree)
+        max_rev_count = min(general_info["review_count"], max_reviews)
+        reviews: List[dict] = []
+        if max_rev_count > 0:
+            with metrics.stage("reviews"):
+                reviews = await self._reviews(tab, max_rev_count)
+        return {
+            "general": general_info,
+            "popular_times": popular_times,
+            "reviews": reviews,
+        }
+
+    async def _run(
+        self, places: Sequence[Tuple[str, str]], max_reviews: int
+    ) -> List[Tuple[str, Optional[dict]]]:
+
+        while len(self.tabs) < min(self.max_tabs, len(places)):
+            self.tabs.append(await Tab.open(self.devtools, self.blocked_urls))
+        idle: asyncio.Queue = asyncio.Queue()
+        for tab in self.tabs:
+            idle.put_nowait(tab)
+
+        async def scrape(pid: str, href: str) -> Optional[dict]:
+            # each place waits for a free tab, so at most max_tabs at once
+            tab = await idle.get()
+            try:
+                return await self._place(tab, pid, href, max_reviews)
+            except Exception:
+                # a closed socket, a script error or a page that won't
+                # parse all lose just this place, as for a timeout
+                logger.exception("Failed to scrape %s in a tab", pid)
+                return None
+            finally:
+                idle.put_nowait(tab)
+
+        scraped = await asyncio.gather(
+            *(scrape(pid, href) for pid, href in places)
+        )
+        return list(zip((pid for pid, _ in places), scraped))
+
+    def scrape(
+        self, places: Sequence[Tuple[str, str]], max_reviews: int
+    ) -> List[Tuple[str, Optional[dict]]]:
+        # scrape a batch of (pid, href), returning (pid, place) in the same
+        # order with place None for any that couldn't be scraped
+        return self.loop.run_until_complete(self._run(places, max_reviews))
+
+    def close(self) -> None:
+        for tab in self.tabs:
+            try:
+                self.loop.run_until_complete(tab.close())
+            except Exception:
+                logger.error("Unable to close tab %s", tab.target_id)
+        self.tabs = []
+        self.devtools.close()
+        self.loop.close()
+
+
+def iter_location_tabs(
+    driver: "Chrome",
+    max_res: int,
+    max_revs: int,
+    orig_coords: Tuple[float, float],
+    max_distance: float,
+    max_tabs: int = 4,
+    shard: Tuple[int, int] = (0, 1),
+    store: Optional[CheckpointStore] = None,
+    query: str = "",
+    start: Tuple[int, int] = (0, 0),
+    seen: Optional[Set[str]] = None,
+    wait: Optional[WaitPolicy] = None,
+    cache: Optional[PageCache] = None,
+    index: Optional[PlaceIndex] = None,
+    max_far: int = 20,
+    blocked_urls: Sequence[str] = (),
+    listed: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, dict]]:
+
+    # as iter_location, but the places from each read of the results list
+    # are scraped together in up to max_tabs tabs while the driver's own
+    # tab stays on the results, so there's no going back after each place
+    # places are yielded in results order once their batch is done
+    # stages overlap between tabs so timings are kept for the run as a
+    # whole rather than per place
+    seen = set() if seen is None else set(seen)
+    wait = wait or DEFAULT_WAIT
+    metrics = get_metrics()
+    page, page_results_processed = start
+    far_run = 0
+    shard_index, shard_count = shard
+
+    logger.info(
+        "Scraping for %s results and %s reviews in %s tabs",
+        max_res,
+        max_revs,
+        max_tabs,
+    )
+    if page > 0 or page_results_processed > 0:
+        resumed = resume_results(driver, start, wait)
+        if resumed is None:
+            logger.info("No results past where the last run got to")
+            if store is not None:
+                store.save_cursor(query, shard, start, finished=True)
+            return
+        page, page_results_processed = resumed
+
+    engine = TabEngine(
+        driver, max_tabs, blocked_urls=blocked_urls, cache=cache
+    )
+    try:
+        while len(seen) < max_res and far_run < max_far:
+
+            links = result_links(driver)
+            in_range = within_km(links, orig_coords, max_distance)
+            # pick out the places to open from the results not yet processed
+            # the cursor saved with each is the start of its batch, so a
+            # resume redoes the batch but skips the places already stored
+            batch_start = page_results_processed
+            batch: List[Tuple[str, str]] = []
+            while (
+                page_results_processed < len(links)
+                and len(seen) + len(batch) < max_res
+                and far_run < max_far
+            ):
+                i = page_results_processed
+                page_results_processed += 1
+                near = bool(in_range[i])
+                far_run = 0 if near else far_run + 1
+                if listed is not None:
+                    listed.add(place_key(links[i]))
+                if (page * 20 + i) % shard_count != shard_index:
+                    continue
+                pid = place_key(links[i])
+                if not near:
+                    logger.info("Too far from query, skipping %s", pid)
+                    continue
+                known = (
+                    pid in seen
+                    or any(pid == p for p, _ in batch)
+                    or (store is not None and store.has_place(query, pid))
+                )
+                if not known and index is not None:
+                    if index.match(pid, query):
+                        seen.add(pid)
+                        known = True
+                if known:
+                    logger.info("Already scraped, skipping %s", pid)
+                    continue
+                batch.append((pid, links[i]))
+
+            if batch:
+                logger.info("Opening %s places in tabs", len(batch))
+                for pid, place in engine.scrape(batch, max_revs):
+                    if place is None:
+                        continue
+                    seen.add(pid)
+                    if index is not None:
+                        index.add(pid, query, place)
+                    if store is not None:
+                        with metrics.stage("checkpoint"):
+                            store.save_place(
+                                query, pid, place, shard, (page, batch_start)
+                            )
+                    yield pid, place
+                metrics.end_place()
+
+            if len(seen) >= max_res or far_run >= max_far:
+                break
+            # all loaded results processed, get more as iter_location does
+            if page_results_processed >= 20:
+                logger.info("Loading new page of 20 results")
+                with metrics.stage("next_page"):
+                    loaded = next_results_page(driver, wait)
+                if len(loaded) == 0:
+                    break
+                page += 1
+                page_results_processed = 0
+            else:
+                with metrics.stage("load_results"):
+                    loaded = load_results(
+                        driver, page_results_processed, wait
+                    )
+                if len(loaded) <= page_results_processed:
+                    break
+
+            if store is not None:
+                store.save_cursor(query, shard, (page, page_results_processed))
+    finally:
+        engine.close()
+
+    if store is not None:
+        store.save_cursor(
+            query, shard, (page, page_results_processed), finished=True
+        )
@@ -0,0 +1,146 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from scrate.geo import EARTH_RADIUS_KM, haversine_km
+
+# splits an area into cells each searched with its own query anchored on
+# the cell, see search.search_area, as one query only ever returns so many
+# results however big the area
+
+# (south, west, north, east) in degrees
+BBox = Tuple[float, float, float, float]
+
+# km per degree of latitude, and of longitude at the equator
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+# metres per pixel of the map at zoom 0 on the equator
+METRES_PER_PIXEL = 156543.03392
+
+
+def distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    return float(haversine_km(np.array([a], dtype=float), b)[0])
+
+
+class Tile:
+    """A lat/lng box searched as one query
+
+    Args:
+        south (float): Southern edge in degrees
+        west (float): Western edge in degrees
+        north (float): Northern edge in degrees
+        east (float): Eastern edge in degrees
+        depth (int): Times the planned cell has been split to get this
+    """
+
+    def __init__(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        depth: int = 0,
+    ) -> None:
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.depth = depth
+
+    @property
+    def centre(self) -> Tuple[float, float]:
+        return ((self.south + self.north) / 2, (self.west + self.east) / 2)
+
+    @property
+    def height_km(self) -> float:
+        return (self.north - self.south) * KM_PER_DEG
+
+    @property
+    def width_km(self) -> float:
+        lat = math.radians(self.centre[0])
+        return (self.east - self.west) * KM_PER_DEG * math.cos(lat)
+
+    @property
+    def radius_km(self) -> float:
+        # centre to corner, so every place in the tile is within it
+        return distance_km(self.centre, (self.north, self.east))
+
+    @property
+    def key(self) -> str:
+        # stands in for the place name in the query key e.g. for the store
+        lat, lng = self.centre
+        return "{:.5f},{:.5f} {:.2f}km".format(
+            lat, lng, max(self.width_km, self.height_km)
+        )
+
+    def split(self) -> List["Tile"]:
+        # the four quarters
+        lat, lng = self.centre
+        depth = self.depth + 1
+        return [
+            Tile(self.south, self.west, lat, lng, depth),
+            Tile(self.south, lng, lat, self.east, depth),
+            Tile(lat, self.west, self.north, lng, depth),
+            Tile(lat, lng, self.north, self.east, depth),
+        ]
+
+    def zoom(self, window_size: Tuple[int, int] = (1920, 1080)) -> int:
+        # closest zoom level at which the whole tile fits in the window
+        lat = math.radians(self.centre[0])
+        metres = METRES_PER_PIXEL * math.cos(lat)
+        zooms = [
+            math.log2(metres * pixels / max(km * 1000, 1))
+            for km, pixels in (
+                (self.width_km, window_size[0]),
+                (self.height_km, window_size[1]),
+            )
+        ]
+        return int(min(21, max(3, math.floor(min(zooms)))))
+
+    def anchor(
+        self, window_size: Tuple[int, int] = (1920, 1080)
+    ) -> Tuple[float, float, int]:
+        # (lat, lng, zoom) to centre the search on, see anchored_session
+        lat, lng = self.centre
+        return (lat, lng, self.zoom(window_size))
+
+
+def bbox_around(centre: Tuple[float, float], radius_km: float) -> BBox:
+    # smallest box holding the circle
+    lat, lng = centre
+    d_lat = radius_km / KM_PER_DEG
+    d_lng = radius_km / (KM_PER_DEG * max(math.cos(math.radians(lat)), 1e-6))
+    return (lat - d_lat, lng - d_lng, lat + d_lat, lng + d_lng)
+
+
+def plan_tiles(
+    bbox: Optional[BBox] = None,
+    centre: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+    cell_km: float = 2.0,
+) -> List[Tile]:
+
+    # grid of cells about cell_km across over the bbox, or over the circle
+    # around centre, leaving out cells with no part in the circle
+    if bbox is None:
+        if centre is None or radius_km is None:
+            raise ValueError("Give either a bbox or a centre and radius")
+        bbox = bbox_around(centre, radius_km)
+    area = Tile(*bbox)
+    rows = max(1, math.ceil(area.height_km / cell_km))
+    cols = max(1, math.ceil(area.width_km / cell_km))
+    lats = np.linspace(area.south, area.north, rows + 1).tolist()
+    lngs = np.linspace(area.west, area.east, cols + 1).tolist()
+    tiles = [
+        Tile(lats[i], lngs[j], lats[i + 1], lngs[j + 1])
+        for i in range(rows)
+        for j in range(cols)
+    ]
+    if centre is not None and radius_km is not None:
+        tiles = [
+            t
+            for t in tiles
+            if distance_km(t.centre, centre) <= radius_km + t.radius_km
+        ]
+    return tiles
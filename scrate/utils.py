@@ -1,7 +1,4 @@
-import numpy as np
-import re
-import time
-from typing import Optional, Match, Tuple
+from typing import Optional, Tuple
 
 from selenium.webdriver import Chrome
 from selenium.common.exceptions import NoSuchElementException
@@ -10,16 +7,40 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import BaseWebElement
 
 from scrate import get_module_logger
+from scrate.parse import parse_geo
+from scrate.waits import (
+    DEFAULT_WAIT,
+    Condition,
+    WaitPolicy,
+    height_grown,
+    random_delay,  # noqa: F401, kept importable from utils
+    visible,
+)
 
 # set logger for this module
 logger = get_module_logger(__name__)
 
 
-def click_element(driver: Chrome, element: BaseWebElement) -> None:
+# scroll element to the bottom, returning its height beforehand so we can
+# tell when more content has loaded
+SCROLL_JS = """
+var h = arguments[0].scrollHeight;
+arguments[0].scrollTo(0, h);
+return h;
+"""
+
+# results list shown when not looking at a specific place
+RESULTS_LIST_XP = "//div[contains(@aria-label, 'Results for')]"
+
+
+def click_element(
+    driver: Chrome, element: BaseWebElement, wait: Optional[WaitPolicy] = None
+) -> None:
+    wait = wait or DEFAULT_WAIT
     # move to the element
     ActionChains(driver).move_to_element(element).perform()
     # add random delay to mask immediate click
-    random_delay(1, 0.5)
+    wait.pause("click", 1, 0.5)
     # click element
     driver.execute_script("arguments[0].click();", element)
     # return nothing
@@ -43,66 +64,58 @@ def literal_search(driver: Chrome) -> None:
 
 def get_geo(driver: Chrome) -> Tuple[float, float]:
     # get gmaps url which contains lat and long
-    url: str = driver.current_url
-    # use regex to strip them, make floats and return
-    url_code: Optional[Match[str]] = re.search(r"(?<=/@)(.*?),(.*?)(?=,)", url)
-    if url_code is not None:
-        geocode: str = url_code[0]
-    else:
-        logger.error("Cannot strip lat and long from url: {}".format(url))
-        return (0.0, 0.0)
-    latitude = float(geocode.split(",")[0])
-    longitude = float(geocode.split(",")[1])
-    return (latitude, longitude)
-
-
-def scroll_down_section(driver: Chrome, css_identifier: str) -> None:
+    return parse_geo(driver.current_url)
+
+
+def scroll_down_section(
+    driver: Chrome, css_identifier: str, wait: Optional[WaitPolicy] = None
+) -> None:
+    wait = wait or DEFAULT_WAIT
     try:
         results_box: BaseWebElement = driver.find_element(
             By.CSS_SELECTOR, css_identifier
         )
-        driver.execute_script(
-            "arguments[0].scrollTo(0, arguments[0].scrollHeight)", results_box
-        )
-        random_delay(2)
+        height = driver.execute_script(SCROLL_JS, results_box)
+        # wait for more content to load into the box
+        wait.wait_for(driver, "scroll", height_grown(results_box, height), 2)
     except NoSuchElementException:
         logger.error("Cannot find results box to scroll down reviews")
     return
 
 
-def scroll_down_results(driver: Chrome, x_path: str) -> None:
+def scroll_down_results(
+    driver: Chrome, x_path: str, wait: Optional[WaitPolicy] = None
+) -> None:
+    wait = wait or DEFAULT_WAIT
     try:
         results_box: BaseWebElement = driver.find_element(By.XPATH, x_path)
-        driver.execute_script(
-            "arguments[0].scrollTo(0, arguments[0].scrollHeight)", results_box
-        )
-        random_delay(2)
+        height = driver.execute_script(SCROLL_JS, results_box)
+        # wait for more results to load into the list
+        wait.wait_for(driver, "scroll", height_grown(results_box, height), 2)
     except NoSuchElementException:
         logger.error("Cannot find results box to scroll down")
     return
 
 
-def back_to_results(driver: Chrome) -> None:
+def back_to_results(
+    driver: Chrome,
+    wait: Optional[WaitPolicy] = None,
+    ready: Optional[Condition] = None,
+) -> None:
+    # ready is what to wait for after going back, by default the results
+    # list being shown again
+    wait = wait or DEFAULT_WAIT
+    if ready is None:
+        ready = visible(RESULTS_LIST_XP)
     # finds back button in top left of search bar and clicks it
     back_button: BaseWebElement = driver.find_elements(
         By.XPATH, "//button[contains(@aria-label, 'Back')]"
     )[-1]
     ActionChains(driver).move_to_element(back_button).perform()
     # add random delay to mask immediate click
-    random_delay(0.75, 0.25)
+    wait.pause("back", 0.75, 0.25)
     driver.execute_script("arguments[0].click();", back_button)
-    random_delay(0.75, 0.25)
-    return
-
-
-def random_delay(
-    c: float, var: float = 1, min_d: float = 0.5, max_d: float = 10
-) -> None:
-    # create a random delay to mask automated behaviour
-    delay: float = c + np.random.uniform(-1, 1) * var
-    delay = np.max([min_d, delay])
-    delay = np.min([max_d, delay])
-    time.sleep(delay)
+    wait.wait_for(driver, "back", ready, 0.75, 0.25)
     return
 
 
@@ -0,0 +1,148 @@
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver import Chrome
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import BaseWebElement
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from scrate.metrics import get_metrics
+
+# a condition takes the driver and is truthy once the page is ready
+Condition = Callable[[Chrome], object]
+
+
+def random_delay(
+    c: float, var: float = 1, min_d: float = 0.5, max_d: float = 10
+) -> None:
+    # create a random delay to mask automated behaviour
+    delay: float = c + random.uniform(-1, 1) * var
+    delay = min(max_d, max(min_d, delay))
+    time.sleep(delay)
+    return
+
+
+def height_grown(element: BaseWebElement, height: int) -> Condition:
+    # scrollable element has loaded more content since it was height tall
+    return lambda driver: (
+        driver.execute_script("return arguments[0].scrollHeight", element)
+        > height
+    )
+
+
+def title_changed(title: str) -> Condition:
+    # tab title differs from title e.g. once a search has gone through
+    return lambda driver: driver.title != title
+
+
+def visible(xp: str) -> Condition:
+    # element matching xpath is displayed
+    return EC.visibility_of_element_located((By.XPATH, xp))
+
+
+def stale(element: BaseWebElement) -> Condition:
+    # element has been removed from the page e.g. on a new page of results
+    return EC.staleness_of(element)
+
+
+class WaitPolicy:
+    """Decides how long to wait at each step of a scrape. This default
+    sleeps for a fixed random delay at every step, as scrate always has.
+
+    Every wait is recorded against a named stage (e.g. 'scroll', 'back') so
+    report() shows where each place's time went.
+    """
+
+    def __init__(self) -> None:
+        self.waited: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def pause(self, stage: str, c: float, var: float = 1) -> None:
+        # deliberate delay to mask automated behaviour e.g. before a click
+        start = time.perf_counter()
+        self._pause(c, var)
+        self._record(stage, start)
+
+    def wait_for(
+        self,
+        driver: Chrome,
+        stage: str,
+        condition: Condition,
+        c: float,
+        var: float = 1,
+    ) -> bool:
+        # wait after an action until the page is ready for the next one
+        # c and var are the fixed delay used by policies that just sleep
+        start = time.perf_counter()
+        ready = self._wait_for(driver, condition, c, var)
+        self._record(stage, start)
+        return ready
+
+    def report(self) -> Dict[str, dict]:
+        # total seconds and number of waits per stage
+        return {
+            stage: {"seconds": self.waited[stage], "count": self.counts[stage]}
+            for stage in self.waited
+        }
+
+    def reset(self) -> None:
+        self.waited.clear()
+        self.counts.clear()
+
+    def _record(self, stage: str, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        self.waited[stage] += elapsed
+        self.counts[stage] += 1
+        get_metrics().delay(stage, elapsed)
+
+    def _pause(self, c: float, var: float) -> None:
+        random_delay(c, var)
+
+    def _wait_for(
+        self, driver: Chrome, condition: Condition, c: float, var: float
+    ) -> bool:
+        random_delay(c, var)
+        return True
+
+
+class ReadinessPolicy(WaitPolicy):
+    """Waits only until a concrete condition holds (more results loaded,
+    pane changed, results list back) rather than for a fixed time
+
+    Args:
+        timeout (float): Most seconds to wait for a condition
+        poll (float): Seconds between checks of a condition
+        pause_scale (float): Fraction of the fixed delays kept for
+            deliberate pauses, 0 to drop them entirely
+    """
+
+    def __init__(
+        self, timeout: float = 10, poll: float = 0.1, pause_scale: float = 0
+    ) -> None:
+        super().__init__()
+        self.timeout = timeout
+        self.poll = poll
+        self.pause_scale = pause_scale
+
+    def _pause(self, c: float, var: float) -> None:
+        if self.pause_scale > 0:
+            random_delay(
+                c * self.pause_scale, var * self.pause_scale, min_d=0
+            )
+
+    def _wait_for(
+        self, driver: Chrome, condition: Condition, c: float, var: float
+    ) -> bool:
+        try:
+            WebDriverWait(driver, self.timeout, self.poll).until(condition)
+            return True
+        except TimeoutException:
+            return False
+
+
+# used wherever a caller doesn't pass a policy of their own
+DEFAULT_WAIT = WaitPolicy()
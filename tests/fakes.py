@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional, Sequence
+
+from lxml import etree
+
+from benchmarks.fake_driver import FakeDriver, load_fixture
+from scrate.pipeline import NAVIGATE_JS
+from scrate.scrape import RESULT_LINKS_JS
+from scrate.snapshot import PANE_JS
+from scrate.tabs import EXISTS_JS
+from scrate.waits import WaitPolicy
+
+# offline stand ins for a browser showing search results, built on the
+# saved place pages of benchmarks.fake_driver
+
+# where the fake searches land, see FakeDriver's url
+ORIGIN = (37.17, -3.59)
+
+
+def result_href(i: int, lat: float = 37.17, lng: float = -3.59) -> str:
+    # a result link with its own feature id and position
+    return (
+        "https://www.google.co.uk/maps/place/Place+{0}/data="
+        "!4m7!3m6!1s0x{0:x}:0x1!8m2!3d{1}!4d{2}!16s".format(i, lat, lng)
+    )
+
+
+def result_hrefs(n: int) -> List[str]:
+    return [result_href(i) for i in range(n)]
+
+
+class NoWait(WaitPolicy):
+    """Never waits, so scrapes of the fakes run at full speed"""
+
+    def _pause(self, c: float, var: float) -> None:
+        pass
+
+    def _wait_for(self, driver, condition, c: float, var: float) -> bool:
+        return True
+
+
+class ResultsDriver(FakeDriver):
+    """A saved place page with a list of results added, as maps shows a
+    place opened from its results. Every result opens the same place.
+
+    Args:
+        hrefs (Sequence[str]): Links of the results, in order
+        fixture (str): Saved place page, see benchmarks.fake_driver
+    """
+
+    def __init__(self, hrefs: Sequence[str], fixture: str = "few_bars"):
+        super().__init__(load_fixture(fixture))
+        self.hrefs = list(hrefs)
+        results = etree.SubElement(
+            self.tree.find(".//body"), "div", {"aria-label": "Results for"}
+        )
+        for href in self.hrefs:
+            etree.SubElement(results, "a", {"href": href})
+
+    def get(self, url: str) -> None:
+        pass
+
+    def quit(self) -> None:
+        pass
+
+    def execute_script(self, script: str, *args):
+        if script == RESULT_LINKS_JS:
+            self.commands += 1
+            return list(self.hrefs)
+        return super().execute_script(script, *args)
+
+
+class SwitchTo:
+    def __init__(self, driver: "WindowsDriver") -> None:
+        self.driver = driver
+
+    def window(self, handle: str) -> None:
+        self.driver.current_window_handle = handle
+
+    def new_window(self, kind: str) -> None:
+        handle = "window-{}".format(len(self.driver.locations))
+        self.driver.locations[handle] = None
+        self.driver.current_window_handle = handle
+
+
+class WindowsDriver(ResultsDriver):
+    """ResultsDriver with the results in one window and places loaded by
+    link in others, as scrate.pipeline drives it
+
+    Args:
+        hrefs (Sequence[str]): Links of the results, in order
+        slow (Sequence[str]): Links of places that never finish loading
+    """
+
+    def __init__(self, hrefs: Sequence[str], slow: Sequence[str] = ()):
+        super().__init__(hrefs)
+        self.slow = set(slow)
+        self.current_window_handle = "results"
+        # link each window has loaded, None for the results
+        self.locations: Dict[str, Optional[str]] = {"results": None}
+        self.switch_to = SwitchTo(self)
+
+    def close(self) -> None:
+        del self.locations[self.current_window_handle]
+
+    def execute_script(self, script: str, *args):
+        location = self.locations[self.current_window_handle]
+        if script == NAVIGATE_JS:
+            self.locations[self.current_window_handle] = args[0]
+            return None
+        if script == EXISTS_JS:
+            return location is not None and location not in self.slow
+        if script == PANE_JS:
+            title, html = super().execute_script(script, *args)
+            return [location, html]
+        return super().execute_script(script, *args)
+
+
+class FakePool:
+    """Hands out one fake driver as SessionPool would a browser"""
+
+    driver_config = None
+
+    def __init__(self, driver: FakeDriver) -> None:
+        self.driver = driver
+        self.released = 0
+
+    def acquire(self) -> FakeDriver:
+        return self.driver
+
+    def release(self, driver: FakeDriver, places: int = 0) -> None:
+        self.released += 1
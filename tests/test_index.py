@@ -0,0 +1,26 @@
+from scrate.index import PlaceIndex, place_key
+
+from tests.fakes import result_href
+
+
+def test_saved_index_keeps_places_and_queries(tmp_path):
+    path = str(tmp_path / "index.db")
+    pid = place_key(result_href(1))
+    index = PlaceIndex(path)
+    index.add(pid, "cafe in granada", {"general": {"name": "Place 1"}})
+    assert index.match(pid, "bar in granada")
+    index.close()
+
+    index = PlaceIndex(path)
+    assert pid in index
+    assert index.queries_for(pid) == ["cafe in granada", "bar in granada"]
+    assert index.pids_for("bar in granada") == [pid]
+    assert index.load_place(pid) == {"general": {"name": "Place 1"}}
+    index.close()
+
+
+def test_memory_index_keeps_no_places():
+    index = PlaceIndex()
+    index.add("0x1:0x1", "cafe in granada", {"general": {}})
+    assert index.count("cafe in granada") == 1
+    assert index.load_place("0x1:0x1") is None
@@ -0,0 +1,37 @@
+import logging
+import multiprocessing
+
+import pytest
+
+from scrate import configure_logging, get_module_logger, stop_logging
+
+
+def log_lines(n):
+    logger = get_module_logger("scrate.tests")
+    for i in range(n):
+        logger.info("line %s", i)
+    logger.error("last line")
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    level = logging.getLogger("scrate").level
+    path = tmp_path / "scrate.log"
+    configure_logging("INFO", str(path))
+    yield path
+    configure_logging(logging.getLevelName(level))
+
+
+def test_forked_workers_flush_their_log(log_path):
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=log_lines, args=(200,)) for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop_logging()
+    lines = log_path.read_text().splitlines()
+    assert len(lines) == 3 * 201
+    assert sum("last line" in line for line in lines) == 3
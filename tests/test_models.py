@@ -0,0 +1,42 @@
+import pytest
+
+from benchmarks.fake_driver import FakeDriver, fixture_names, load_fixture
+from scrate.models import OpeningHours, Place, RatingDistribution
+from scrate.parse import parse_general_info
+from scrate.snapshot import PANE_JS, PlaceSnapshot
+
+
+@pytest.mark.parametrize("name", fixture_names())
+def test_fixture_places_fit_the_compact_form(name):
+    title, html = FakeDriver(load_fixture(name)).execute_script(PANE_JS)
+    general = parse_general_info(PlaceSnapshot(title, html))
+    place = Place.from_dict({"general": general})
+    assert place.rating_dist.raw == ()
+    assert place.opening_hours.raw == ()
+    # normalised, but reading the same
+    again = Place.from_dict({"general": place.general()})
+    assert again.rating_dist.counts == place.rating_dist.counts
+    assert again.general() == place.general()
+    assert place.general()["opening_hours"] == [
+        e.strip() for e in general["opening_hours"]
+    ]
+
+
+def test_rating_labels_as_maps_writes_them():
+    labels = [
+        "5 stars, 1,204 reviews",
+        "4 stars, 1 review",
+        "3 stars, 0 reviews",
+        "2 stars, 12 reviews",
+        "1 stars, 3 reviews",
+    ]
+    dist = RatingDistribution.from_labels(labels)
+    assert list(dist.counts) == [3, 12, 0, 1, 1204]
+    assert dist.to_labels() == labels
+
+
+def test_unrecognised_formats_kept_raw():
+    dist = RatingDistribution.from_labels(["five stars"])
+    assert dist.to_labels() == ["five stars"]
+    hours = OpeningHours.from_entries(["Monday, open 24 hours"])
+    assert hours.to_entries() == ["Monday, open 24 hours"]
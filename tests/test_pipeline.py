@@ -0,0 +1,61 @@
+from scrate.index import place_key
+from scrate.pipeline import iter_location_pipelined
+from scrate.scrape import iter_location
+
+from tests.fakes import ORIGIN, NoWait, WindowsDriver, result_hrefs
+
+
+def pipelined(driver, max_res):
+    places = iter_location_pipelined(
+        driver, max_res, 0, ORIGIN, 20.0, wait=NoWait(), timeout=0
+    )
+    return [pid for pid, _ in places]
+
+
+def test_same_places_in_same_order_as_serial(monkeypatch):
+    monkeypatch.setattr("scrate.scrape.click_element", lambda *a, **k: None)
+    monkeypatch.setattr("scrate.scrape.back_to_results", lambda *a, **k: None)
+    hrefs = result_hrefs(8)
+    serial = iter_location(
+        WindowsDriver(hrefs), 5, 0, ORIGIN, 20.0, wait=NoWait()
+    )
+    assert pipelined(WindowsDriver(hrefs), 5) == [pid for pid, _ in serial]
+
+
+def test_stops_at_max_res():
+    hrefs = result_hrefs(8)
+    driver = WindowsDriver(hrefs)
+    assert pipelined(driver, 3) == [place_key(h) for h in hrefs[:3]]
+    # both place windows closed, back on the results
+    assert list(driver.locations) == ["results"]
+
+
+def test_place_timing_out_last_is_replaced():
+    hrefs = result_hrefs(8)
+    driver = WindowsDriver(hrefs, slow=[hrefs[2]])
+    assert pipelined(driver, 3) == [place_key(hrefs[i]) for i in (0, 1, 3)]
+
+
+def test_place_timing_out_early_is_replaced():
+    hrefs = result_hrefs(8)
+    driver = WindowsDriver(hrefs, slow=[hrefs[0]])
+    assert pipelined(driver, 3) == [place_key(hrefs[i]) for i in (1, 2, 3)]
+
+
+def test_ends_with_the_results():
+    hrefs = result_hrefs(6)
+    assert pipelined(WindowsDriver(hrefs), 20) == [place_key(h) for h in hrefs]
+
+
+def test_resume_after_a_full_page():
+    places = iter_location_pipelined(
+        WindowsDriver(result_hrefs(20)),
+        30,
+        0,
+        ORIGIN,
+        20.0,
+        start=(0, 20),
+        wait=NoWait(),
+        timeout=0,
+    )
+    assert list(places) == []
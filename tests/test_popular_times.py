@@ -0,0 +1,22 @@
+import numpy as np
+
+from scrate.popular_times import MISSING, PopularTimesStack
+
+
+def test_stack_keeps_places_added_across_growth():
+    stack = PopularTimesStack(capacity=1)
+    first = np.full((7, 24), 10, dtype=np.uint8)
+    row = stack.add("0x1:0x1", first)
+    stack.add("0x2:0x1", np.full((7, 24), 20, dtype=np.uint8))
+    assert len(stack.data) == 2
+    assert (stack.array[0] == 10).all() and (stack.array[1] == 20).all()
+
+    # the row returned before growing points at the old block
+    row[...] = 30
+    assert (stack.array[0] == 10).all()
+
+
+def test_stack_slots_start_missing():
+    stack = PopularTimesStack(capacity=2)
+    assert (stack.slot("0x1:0x1") == MISSING).all()
+    assert stack.array.shape == (1, 7, 24)
@@ -0,0 +1,24 @@
+import time
+
+from benchmarks.fake_driver import load_fixture
+from scrate.cache import PageCache
+from scrate.reparse import reparse
+from scrate.snapshot import PlaceSnapshot
+
+
+def test_reparse_skips_expired_pages(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache = PageCache(cache_dir)
+    snapshot = PlaceSnapshot("Bar - Google Maps", load_fixture("few_bars"))
+    cache.put("0x1:0x1", snapshot)
+    cache.close()
+    assert list(reparse(cache_dir, workers=1)) == ["0x1:0x1"]
+
+    # an hour later the page is past a ttl of a minute
+    now = time.time()
+    cache = PageCache(cache_dir)
+    with cache.conn:
+        cache.conn.execute("UPDATE entries SET created = ?", (now - 3600,))
+    cache.close()
+    assert reparse(cache_dir, workers=1, ttl=60) == {}
+    assert PageCache(cache_dir).pids() == []
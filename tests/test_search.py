@@ -0,0 +1,150 @@
+import pytest
+from lxml import etree
+
+from scrate.index import place_key
+from scrate.scrape import iter_location, load_results
+from scrate.search import SearchOptions, iter_search, search_area
+
+from tests.fakes import (
+    ORIGIN,
+    FakePool,
+    NoWait,
+    ResultsDriver,
+    result_href,
+    result_hrefs,
+)
+
+HREFS = result_hrefs(12)
+ANCHOR = (37.17, -3.59, 15)
+
+
+@pytest.fixture(autouse=True)
+def no_clicks(monkeypatch):
+    # every result opens the same saved place, nothing to click
+    monkeypatch.setattr("scrate.scrape.click_element", lambda *a, **k: None)
+    monkeypatch.setattr("scrate.scrape.back_to_results", lambda *a, **k: None)
+
+
+def search(checkpoint, max_results=5):
+    return iter_search(
+        "granada",
+        "restaurant",
+        max_results,
+        0,
+        20.0,
+        options=SearchOptions(checkpoint=checkpoint, wait=NoWait()),
+        pool=FakePool(ResultsDriver(HREFS)),
+        anchor=ANCHOR,
+    )
+
+
+def test_resumed_search_matches_uninterrupted(tmp_path):
+    expected = list(search(str(tmp_path / "whole.db")))
+    # stop after two places, as if killed, then run again
+    interrupted = search(str(tmp_path / "resumed.db"))
+    for _ in range(2):
+        next(interrupted)
+    interrupted.close()
+    resumed = list(search(str(tmp_path / "resumed.db")))
+    assert [pid for pid, _ in resumed] == [pid for pid, _ in expected]
+    assert [p["general"] for _, p in resumed] == [
+        p["general"] for _, p in expected
+    ]
+
+
+def test_finished_search_is_not_scraped_again(tmp_path):
+    checkpoint = str(tmp_path / "search.db")
+    expected = [pid for pid, _ in search(checkpoint)]
+    pool = FakePool(ResultsDriver(HREFS))
+    places = iter_search(
+        "granada",
+        "restaurant",
+        5,
+        0,
+        20.0,
+        options=SearchOptions(checkpoint=checkpoint, wait=NoWait()),
+        pool=pool,
+        anchor=ANCHOR,
+    )
+    assert [pid for pid, _ in places] == expected
+    assert pool.driver.commands == 0
+
+
+def test_shards_are_disjoint_and_cover_the_results():
+    def scrape(max_res, shard):
+        driver = ResultsDriver(HREFS)
+        places = iter_location(
+            driver, max_res, 0, ORIGIN, 20.0, shard, wait=NoWait()
+        )
+        return [pid for pid, _ in places]
+
+    first, second = scrape(3, (0, 2)), scrape(3, (1, 2))
+    assert not set(first) & set(second)
+    assert sorted(first + second) == sorted(scrape(6, (0, 1)))
+    assert first == [place_key(h) for h in HREFS[0:6:2]]
+
+
+
+@pytest.mark.parametrize("n", [12, 20])
+def test_search_ends_with_the_results(n):
+    # fewer results than wanted, ending part way down a page or with a
+    # full page and no next page
+    hrefs = result_hrefs(n)
+    places = iter_location(
+        ResultsDriver(hrefs), 30, 0, ORIGIN, 20.0, wait=NoWait()
+    )
+    assert [pid for pid, _ in places] == [place_key(h) for h in hrefs]
+
+
+def test_listed_counts_results_out_of_reach():
+    hrefs = result_hrefs(4) + [result_href(i, lat=40.0) for i in range(4, 8)]
+    listed = set()
+    places = iter_location(
+        ResultsDriver(hrefs), 30, 0, ORIGIN, 20.0, wait=NoWait(), listed=listed
+    )
+    assert len(list(places)) == 4
+    assert listed == {place_key(h) for h in hrefs}
+
+
+def test_load_results_stops_at_end_of_list_note():
+    driver = ResultsDriver(result_hrefs(3))
+    note = etree.SubElement(driver.tree.find(".//body"), "span")
+    note.text = "You've reached the end of the list."
+    assert len(load_results(driver, 3, NoWait())) == 3
+    # two lookups and no scroll
+    assert driver.commands == 2
+
+
+def test_area_rerun_with_saved_index_returns_earlier_places(tmp_path):
+    def area():
+        return search_area(
+            "restaurant",
+            bbox=(37.16, -3.60, 37.18, -3.58),
+            cell_km=5.0,
+            options=SearchOptions(wait=NoWait()),
+            pool=FakePool(ResultsDriver(result_hrefs(5))),
+            index_path=str(tmp_path / "index.db"),
+        )
+
+    first = area()
+    assert len(first) == 5
+    second = area()
+    assert list(second) == list(first)
+    assert [p["general"] for p in second.values()] == [
+        p["general"] for p in first.values()
+    ]
+
+
+@pytest.mark.parametrize("start", [(0, 20), (0, 12)])
+def test_resume_at_the_end_of_the_results(start):
+    # a cursor saved with the last place of a full page, or of the results
+    places = iter_location(
+        ResultsDriver(result_hrefs(start[1])),
+        30,
+        0,
+        ORIGIN,
+        20.0,
+        start=start,
+        wait=NoWait(),
+    )
+    assert list(places) == []
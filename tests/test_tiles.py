@@ -0,0 +1,48 @@
+import pytest
+
+from scrate.tiles import Tile, bbox_around, distance_km, plan_tiles
+
+GRANADA = (37.17, -3.59)
+
+
+def test_split_quarters_cover_the_tile():
+    tile = Tile(37.0, -3.7, 37.2, -3.5)
+    quarters = tile.split()
+    assert len(quarters) == 4
+    assert all(q.depth == 1 for q in quarters)
+    assert sum(q.width_km * q.height_km for q in quarters) == pytest.approx(
+        tile.width_km * tile.height_km, rel=1e-3
+    )
+    assert min(q.south for q in quarters) == tile.south
+    assert max(q.north for q in quarters) == tile.north
+    assert min(q.west for q in quarters) == tile.west
+    assert max(q.east for q in quarters) == tile.east
+    assert len({q.key for q in quarters}) == 4
+
+
+def test_plan_bbox_cells_are_about_cell_km():
+    tiles = plan_tiles(bbox=(37.1, -3.7, 37.2, -3.5), cell_km=2.0)
+    assert len(tiles) > 1
+    assert all(t.width_km <= 2.0 and t.height_km <= 2.0 for t in tiles)
+    assert len({t.key for t in tiles}) == len(tiles)
+
+
+def test_plan_circle_drops_cells_outside():
+    tiles = plan_tiles(centre=GRANADA, radius_km=10.0, cell_km=1.0)
+    box = plan_tiles(bbox=bbox_around(GRANADA, 10.0), cell_km=1.0)
+    assert 0 < len(tiles) < len(box)
+    assert all(
+        distance_km(t.centre, GRANADA) <= 10.0 + t.radius_km for t in tiles
+    )
+
+
+def test_plan_needs_an_area():
+    with pytest.raises(ValueError):
+        plan_tiles(centre=GRANADA)
+
+
+def test_anchor_zoom_fits_the_tile():
+    small = Tile(37.17, -3.6, 37.18, -3.59)
+    big = Tile(37.0, -3.8, 37.4, -3.4)
+    assert small.anchor()[:2] == small.centre
+    assert small.zoom() > big.zoom()